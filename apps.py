@@ -1,4 +1,4 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
 from django.core.checks import register, Error, Warning, Info, Tags
 
 class CmnsdConfig(AppConfig):
@@ -7,4 +7,15 @@ class CmnsdConfig(AppConfig):
     
     def ready(self):
         # Register checks when app is ready
-        from . import checks
\ No newline at end of file
+        from . import checks
+        # Keep opt-in comment counters up to date
+        if apps.is_installed('django.contrib.contenttypes'):
+            from .models.CommentCounter import connect_comment_counters
+            connect_comment_counters()
+        # Clear cached user exclusions when a profile changes
+        from .models.UserExclusions import connect_user_exclusions
+        connect_user_exclusions()
+
+        # Expire cached objects of the ajax views when they are saved
+        from .models.ObjectCache import connect_object_cache
+        connect_object_cache()
\ No newline at end of file
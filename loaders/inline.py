@@ -0,0 +1,94 @@
+from django.template import Origin, TemplateDoesNotExist
+from django.template.loaders.base import Loader as BaseLoader
+
+import re
+
+''' Include inlining
+    Replaces {% include "literal" %} tags with the source of the included
+    template when the template is loaded, so loops over fragments such as
+    field/tags.html do not resolve and set up the included template for
+    every item. Targets are resolved through the wrapped loaders, so project
+    overrides of the included templates are inlined.
+'''
+DEFAULT_INLINE_INCLUDE_PREFIXES = ['field/', 'model/', 'object/', 'function/']
+MAX_INLINE_DEPTH = 5
+
+_include = re.compile(
+  r'{%\s*include\s+(?P<quote>["\'])(?P<name>[^"\']+)(?P=quote)'
+  r'(?:\s+with\s+(?P<with>(?:(?!\bonly\b)[^%])+?))?(?P<only>\s+only)?\s*%}'
+)
+# Included templates that depend on their own template scope are not inlined
+_scoped = re.compile(r'{%\s*(extends|block|cycle|resetcycle|ifchanged|verbatim)\b')
+
+
+class Loader(BaseLoader):
+  """
+  Template loader that inlines static includes of the cmnsd fragment
+  templates. Wraps other loaders; place it inside the cached loader:
+
+    'loaders': [
+      ('django.template.loaders.cached.Loader', [
+        ('cmnsd.loaders.inline.Loader', [
+          'django.template.loaders.filesystem.Loader',
+          'django.template.loaders.app_directories.Loader',
+        ]),
+      ]),
+    ],
+
+  Only includes of templates starting with one of INLINE_INCLUDE_PREFIXES
+  (default: field/, model/, object/, function/) are inlined. Includes with
+  `only`, variable template names and included templates using extends,
+  block, cycle, resetcycle, ifchanged or verbatim are left as they are.
+  `with` arguments become a {% with %} block.
+  """
+
+  def __init__(self, engine, loaders):
+    super().__init__(engine)
+    self.loaders = engine.get_template_loaders(loaders)
+
+  def get_template_sources(self, template_name):
+    for loader in self.loaders:
+      for origin in loader.get_template_sources(template_name):
+        wrapped = Origin(name=origin.name, template_name=origin.template_name, loader=self)
+        wrapped.source_origin = origin
+        # Keep flags of wrapped loaders, e.g. cmnsd.loaders.minify
+        wrapped.minified = getattr(origin, 'minified', False)
+        yield wrapped
+
+  def get_contents(self, origin):
+    source = origin.source_origin.loader.get_contents(origin.source_origin)
+    return self.inline_includes(source, [origin.template_name])
+
+  def get_prefixes(self):
+    from django.conf import settings
+    return tuple(getattr(settings, 'INLINE_INCLUDE_PREFIXES', DEFAULT_INLINE_INCLUDE_PREFIXES))
+
+  def get_source(self, template_name):
+    """ Return the source of the first template found for template_name, or None. """
+    for origin in self.get_template_sources(template_name):
+      try:
+        return origin.source_origin.loader.get_contents(origin.source_origin)
+      except TemplateDoesNotExist:
+        continue
+    return None
+
+  def inline_includes(self, source, seen):
+    """ Replace the inlinable include tags in source. seen lists the templates being inlined. """
+    prefixes = self.get_prefixes()
+    def replace(match):
+      name = match.group('name')
+      if match.group('only') or not name.startswith(prefixes) or name in seen or len(seen) > MAX_INLINE_DEPTH:
+        return match.group(0)
+      included = self.get_source(name)
+      if included is None or _scoped.search(included):
+        return match.group(0)
+      included = self.inline_includes(included, seen + [name])
+      if match.group('with'):
+        return f"{{% with {match.group('with').strip()} %}}{included}{{% endwith %}}"
+      return included
+    return _include.sub(replace, source)
+
+  def reset(self):
+    for loader in self.loaders:
+      if hasattr(loader, 'reset'):
+        loader.reset()
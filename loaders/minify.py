@@ -0,0 +1,110 @@
+from django.template import Origin
+from django.template.loaders.base import Loader as BaseLoader
+
+import re
+
+''' Whitespace minification
+    Outside <pre>, <textarea>, <script> and <style> elements newlines and
+    tabs are removed and runs of spaces are collapsed to one space, in a
+    single pass over the text. Used for rendered AJAX fragments and, through
+    the template loader below, for template sources when they are compiled.
+'''
+_preserved = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_newlines = re.compile(r'[\r\n\t]+')
+_spaces = re.compile(r' {2,}')
+_blank_lines = re.compile(r'^[ \t\r\f\v]*\n', re.MULTILINE)
+
+DEFAULT_MINIFY_TEMPLATE_PREFIXES = ['field/', 'model/', 'object/', 'function/']
+
+def _split_preserved(text):
+  """ Yield (part, preserved) tuples of text. """
+  position = 0
+  for match in _preserved.finditer(text):
+    yield text[position:match.start()], False
+    yield match.group(0), True
+    position = match.end()
+  yield text[position:], False
+
+def minify_fragment(text, remove_newlines=True):
+  """
+  Minify a rendered fragment in linear time.
+
+  Args:
+    text (str): Rendered HTML.
+    remove_newlines (bool): Remove newlines and tabs and collapse spaces.
+      When False, only blank lines are removed.
+
+  Returns:
+    str: The minified text, stripped.
+  """
+  if remove_newlines:
+    parts = [part if preserved else _spaces.sub(' ', _newlines.sub('', part)) for part, preserved in _split_preserved(text)]
+  else:
+    parts = [part if preserved else _blank_lines.sub('', part) for part, preserved in _split_preserved(text)]
+  return ''.join(parts).strip()
+
+def is_minified_template(template):
+  """ Return True if a template (backend or engine template) was loaded through the minify Loader. """
+  template = getattr(template, 'template', template)
+  return getattr(getattr(template, 'origin', None), 'minified', False)
+
+
+class Loader(BaseLoader):
+  """
+  Template loader that minifies template sources once, when they are
+  compiled, so rendered fragments need no per-request whitespace pass.
+  Wraps other loaders; place it inside the cached loader:
+
+    'loaders': [
+      ('django.template.loaders.cached.Loader', [
+        ('cmnsd.loaders.minify.Loader', [
+          'django.template.loaders.filesystem.Loader',
+          'django.template.loaders.app_directories.Loader',
+        ]),
+      ]),
+    ],
+
+  Only the AJAX fragment templates are minified: names starting with one
+  of MINIFY_TEMPLATE_PREFIXES (default: field/, model/, object/, function/)
+  and ending in one of MINIFY_TEMPLATE_EXTENSIONS (default: .html). Other
+  templates, such as full pages, are loaded unchanged. Sources are minified
+  as rendered fragments are: with AJAX_RENDER_REMOVE_NEWLINES newlines and
+  tabs are removed, otherwise only blank lines; lines holding only template
+  tags then still render blank, so ResponseMixin.render() removes those.
+  """
+
+  def __init__(self, engine, loaders):
+    super().__init__(engine)
+    self.loaders = engine.get_template_loaders(loaders)
+
+  def get_template_sources(self, template_name):
+    for loader in self.loaders:
+      for origin in loader.get_template_sources(template_name):
+        wrapped = Origin(name=origin.name, template_name=origin.template_name, loader=self)
+        wrapped.source_origin = origin
+        wrapped.minified = self.is_fragment(str(origin.template_name or ''))
+        yield wrapped
+
+  def get_extensions(self):
+    from django.conf import settings
+    return tuple(getattr(settings, 'MINIFY_TEMPLATE_EXTENSIONS', ['.html']))
+
+  def get_prefixes(self):
+    from django.conf import settings
+    return tuple(getattr(settings, 'MINIFY_TEMPLATE_PREFIXES', DEFAULT_MINIFY_TEMPLATE_PREFIXES))
+
+  def is_fragment(self, template_name):
+    """ Return True if template_name is a fragment template to minify. """
+    return template_name.startswith(self.get_prefixes()) and template_name.endswith(self.get_extensions())
+
+  def get_contents(self, origin):
+    from django.conf import settings
+    source = origin.source_origin.loader.get_contents(origin.source_origin)
+    if not origin.minified:
+      return source
+    return minify_fragment(source, remove_newlines=getattr(settings, 'AJAX_RENDER_REMOVE_NEWLINES', False))
+
+  def reset(self):
+    for loader in self.loaders:
+      if hasattr(loader, 'reset'):
+        loader.reset()
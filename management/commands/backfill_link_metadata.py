@@ -0,0 +1,71 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from cmnsd.models.Link import BaseLink, get_link_display_metadata, canonicalize_url
+
+
+class Command(BaseCommand):
+  help = (
+    "Fill the domain, display_label and canonical_url columns of all BaseLink models from their URL. "
+    "Changed rows are written with bulk_update(); save() is not called."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+                        help="Limit the backfill to these models. Default: all BaseLink models.")
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help="Number of rows read and written per batch.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only report the number of rows that would change.")
+
+  def handle(self, *args, **options):
+    if options['batch_size'] < 1:
+      raise CommandError("--batch-size must be at least 1")
+    total = 0
+    for model in self.get_models(options['models']):
+      started = time.monotonic()
+      changed = self.backfill(model, options)
+      total += changed
+      action = 'would change' if options['dry_run'] else 'changed'
+      self.stdout.write(f"{model._meta.label}: {changed} rows {action} in {time.monotonic() - started:.1f}s")
+    self.stdout.write(self.style.SUCCESS(f"Total: {total} rows {'would change' if options['dry_run'] else 'changed'}"))
+
+  def get_models(self, labels):
+    """ Return the concrete BaseLink models. """
+    if labels:
+      try:
+        models = [apps.get_model(label) for label in labels]
+      except (LookupError, ValueError) as e:
+        raise CommandError(str(e))
+    else:
+      models = apps.get_models()
+    return [
+      model for model in models
+      if issubclass(model, BaseLink) and not model._meta.proxy
+    ]
+
+  def backfill(self, model, options):
+    """ Write changed metadata of one model in batches. Returns the number of changed rows. """
+    changed = 0
+    batch = []
+    queryset = model._base_manager.only('pk', 'url', 'domain', 'display_label', 'canonical_url').order_by('pk')
+    for obj in queryset.iterator(chunk_size=options['batch_size']):
+      domain, display_label = get_link_display_metadata(obj.url)
+      canonical_url = canonicalize_url(obj.url)
+      if (obj.domain, obj.display_label, obj.canonical_url) == (domain, display_label, canonical_url):
+        continue
+      obj.domain, obj.display_label, obj.canonical_url = domain, display_label, canonical_url
+      batch.append(obj)
+      if len(batch) >= options['batch_size']:
+        changed += self.write(model, batch, options)
+        batch = []
+    if batch:
+      changed += self.write(model, batch, options)
+    return changed
+
+  def write(self, model, batch, options):
+    if not options['dry_run']:
+      model._base_manager.bulk_update(batch, ['domain', 'display_label', 'canonical_url'], batch_size=options['batch_size'])
+    return len(batch)
@@ -0,0 +1,151 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction, router
+
+from cmnsd.models.Comment import BaseComment
+from cmnsd.models.Link import BaseLink
+
+
+class Command(BaseCommand):
+  help = (
+    "Merge published BaseLink rows that share a canonical URL, owner and visibility. The "
+    "oldest row is kept; relations of the duplicates are repointed to it and the duplicates "
+    "are deleted. Rows with a label of their own are reported and left alone. Run "
+    "backfill_link_metadata first so every row has a canonical URL."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+                        help="Limit the merge to these models. Default: all BaseLink models.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only report the duplicates that would be merged.")
+
+  def handle(self, *args, **options):
+    total = 0
+    for model in self.get_models(options['models']):
+      started = time.monotonic()
+      merged = self.merge_model(model, options)
+      total += merged
+      action = 'would be merged' if options['dry_run'] else 'merged'
+      self.stdout.write(f"{model._meta.label}: {merged} duplicates {action} in {time.monotonic() - started:.1f}s")
+    self.stdout.write(self.style.SUCCESS(f"Total: {total} duplicates {'would be merged' if options['dry_run'] else 'merged'}"))
+
+  def get_models(self, labels):
+    """ Return the concrete BaseLink models. """
+    if labels:
+      try:
+        models = [apps.get_model(label) for label in labels]
+      except (LookupError, ValueError) as e:
+        raise CommandError(str(e))
+    else:
+      models = apps.get_models()
+    return [
+      model for model in models
+      if issubclass(model, BaseLink) and not model._meta.proxy
+    ]
+
+  def merge_model(self, model, options):
+    """
+    Merge all groups of duplicates of one model.
+
+    Rows are duplicates when they share the canonical URL, the owner and,
+    when the model has one, the visibility. Only published rows are merged,
+    so a concept, revoked or deleted row is never kept. Rows whose label
+    differs from the generated display label are reported and skipped.
+
+    Returns:
+      int: the number of deleted rows.
+    """
+    keys = ['canonical_url', 'user']
+    if any(field.name == 'visibility' for field in model._meta.concrete_fields):
+      keys.append('visibility')
+    published = model._base_manager.filter(status='p').exclude(canonical_url='')
+    generated = models.Q(label='') | models.Q(label=models.F('display_label'))
+    candidates = published.filter(generated)
+    duplicated = (
+      candidates.values(*keys).annotate(count=models.Count('pk')).filter(count__gt=1)
+      .values_list('canonical_url', flat=True)
+    )
+    groups = {}
+    for pk, *key in candidates.filter(canonical_url__in=duplicated).order_by('pk').values_list('pk', *keys):
+      groups.setdefault(tuple(key), []).append(pk)
+    groups = {key: pks for key, pks in groups.items() if len(pks) > 1}
+    canonical_urls = {key[0] for key in groups}
+    for pk, canonical_url, label in published.exclude(generated).filter(canonical_url__in=canonical_urls).values_list('pk', 'canonical_url', 'label'):
+      self.stdout.write(f"  {canonical_url}: skip {pk}, label '{label}' differs from the generated one")
+    if options['dry_run']:
+      for key, pks in groups.items():
+        self.stdout.write(f"  {key[0]}: keep {pks[0]}, merge {', '.join(str(pk) for pk in pks[1:])}")
+      return sum(len(pks) - 1 for pks in groups.values())
+    relations = self.get_relations(model)
+    using = router.db_for_write(model)
+    merged = 0
+    for pks in groups.values():
+      keeper, duplicates = pks[0], pks[1:]
+      with transaction.atomic(using=using):
+        for relation in relations:
+          relation(keeper, duplicates, using)
+        model._base_manager.using(using).filter(pk__in=duplicates).delete()
+      merged += len(duplicates)
+    return merged
+
+  def get_relations(self, model):
+    """
+    Return a callable per relation pointing to the model that moves the
+    relation from the duplicates to the keeper: reverse foreign keys,
+    many-to-many fields in both directions and generic comments.
+    """
+    relations = []
+    for field in model._meta.get_fields(include_hidden=True):
+      if field.many_to_many:
+        if field.auto_created:
+          # Reverse many-to-many: the field is declared on the other model
+          m2m = field.field
+          relations.append(self.m2m_relation(m2m.remote_field.through, m2m.m2m_reverse_name(), m2m.m2m_column_name()))
+        else:
+          relations.append(self.m2m_relation(field.remote_field.through, field.m2m_column_name(), field.m2m_reverse_name()))
+      elif field.one_to_many and field.auto_created and not field.related_model._meta.auto_created:
+        relations.append(self.fk_relation(field.related_model, field.field.attname))
+    comment_models = [m for m in apps.get_models() if issubclass(m, BaseComment)]
+    if comment_models:
+      from django.contrib.contenttypes.models import ContentType
+      content_type = ContentType.objects.get_for_model(model)
+      for comment_model in comment_models:
+        relations.append(self.comment_relation(comment_model, content_type))
+    return relations
+
+  @staticmethod
+  def fk_relation(related_model, attname):
+    def repoint(keeper, duplicates, using):
+      related_model._base_manager.using(using).filter(**{f'{attname}__in': duplicates}).update(**{attname: keeper})
+    return repoint
+
+  @staticmethod
+  def m2m_relation(through, link_column, other_column):
+    """
+    Move through rows from the duplicates to the keeper. Rows that would
+    link the same object to the keeper twice are deleted instead.
+    """
+    def repoint(keeper, duplicates, using):
+      manager = through._base_manager.using(using)
+      seen = set(manager.filter(**{link_column: keeper}).values_list(other_column, flat=True))
+      move, delete = [], []
+      for pk, other in manager.filter(**{f'{link_column}__in': duplicates}).order_by('pk').values_list('pk', other_column):
+        if other in seen:
+          delete.append(pk)
+        else:
+          seen.add(other)
+          move.append(pk)
+      if delete:
+        manager.filter(pk__in=delete).delete()
+      if move:
+        manager.filter(pk__in=move).update(**{link_column: keeper})
+    return repoint
+
+  @staticmethod
+  def comment_relation(comment_model, content_type):
+    def repoint(keeper, duplicates, using):
+      comment_model._base_manager.using(using).filter(content_type=content_type, object_id__in=duplicates).update(object_id=keeper)
+    return repoint
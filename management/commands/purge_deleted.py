@@ -0,0 +1,165 @@
+import os
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction, router
+from django.db.models import ProtectedError, RestrictedError
+from django.utils import timezone
+
+from cmnsd.models.BaseModel import BaseModel
+from cmnsd.models.Comment import BaseComment
+
+
+class Command(BaseCommand):
+  help = (
+    "Hard-delete rows of BaseModel subclasses that were marked as deleted (status 'x') "
+    "longer ago than --days. Rows are removed in primary-key ordered chunks, each in its "
+    "own short transaction, with a pause between chunks."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+                        help="Limit the purge to these models. Default: all BaseModel subclasses.")
+    parser.add_argument('--days', type=int, default=getattr(settings, 'PURGE_DELETED_AFTER_DAYS', 30),
+                        help="Only purge rows deleted (last modified) more than this many days ago.")
+    parser.add_argument('--chunk-size', type=int, default=500,
+                        help="Number of rows deleted per transaction.")
+    parser.add_argument('--sleep', type=float, default=0.1,
+                        help="Seconds to wait between chunks.")
+    parser.add_argument('--archive', metavar='DIRECTORY',
+                        help="Write purged rows as JSON lines to <DIRECTORY>/<app_label>.<model>.jsonl before deleting.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only report the number of rows that would be purged.")
+
+  def handle(self, *args, **options):
+    if options['chunk_size'] < 1:
+      raise CommandError("--chunk-size must be at least 1")
+    if options['archive']:
+      os.makedirs(options['archive'], exist_ok=True)
+    cutoff = timezone.now() - timedelta(days=options['days'])
+    comment_models = [model for model in apps.get_models() if issubclass(model, BaseComment)]
+    total = 0
+    for model in self.get_models(options['models']):
+      queryset = model._base_manager.filter(status='x', date_modified__lt=cutoff)
+      if options['dry_run']:
+        count = queryset.count()
+        self.stdout.write(f"{model._meta.label}: {count} rows would be purged")
+        total += count
+        continue
+      started = time.monotonic()
+      count, skipped = self.purge(model, queryset, comment_models, options)
+      total += count
+      message = f"{model._meta.label}: purged {count} rows in {time.monotonic() - started:.1f}s"
+      if skipped:
+        message += f", skipped {skipped} protected rows"
+      self.stdout.write(self.style.SUCCESS(message) if count else message)
+    self.stdout.write(f"Total: {total} rows{' would be' if options['dry_run'] else ''} purged")
+
+  def get_models(self, labels):
+    """ Return the concrete BaseModel subclasses to purge. """
+    if labels:
+      try:
+        models = [apps.get_model(label) for label in labels]
+      except (LookupError, ValueError) as e:
+        raise CommandError(str(e))
+    else:
+      models = apps.get_models()
+    return [
+      model for model in models
+      if issubclass(model, BaseModel) and not model._meta.proxy
+    ]
+
+  def purge(self, model, queryset, comment_models, options):
+    """
+    Delete the rows of queryset in chunks ordered by primary key.
+
+    Many-to-many rows are removed by Django's collector with one delete per
+    through table. Comments attached through a GenericForeignKey are removed
+    with one delete per comment model, also when the model declares no
+    GenericRelation.
+
+    Returns:
+      tuple: (purged, skipped) row counts.
+    """
+    using = router.db_for_write(model)
+    content_type = None
+    if comment_models:
+      from django.contrib.contenttypes.models import ContentType
+      content_type = ContentType.objects.db_manager(using).get_for_model(model)
+    purged = skipped = 0
+    last_pk = None
+    while True:
+      chunk = queryset.using(using).order_by('pk')
+      if last_pk is not None:
+        chunk = chunk.filter(pk__gt=last_pk)
+      pks = list(chunk.values_list('pk', flat=True)[:options['chunk_size']])
+      if not pks:
+        break
+      last_pk = pks[-1]
+      try:
+        self.purge_rows(model, pks, using, content_type, comment_models, options)
+        purged += len(pks)
+      except (ProtectedError, RestrictedError):
+        if len(pks) == 1:
+          skipped += 1
+        else:
+          # Retry row by row so only the protected rows are skipped
+          for pk in pks:
+            try:
+              self.purge_rows(model, [pk], using, content_type, comment_models, options)
+              purged += 1
+            except (ProtectedError, RestrictedError):
+              skipped += 1
+      if options['verbosity'] > 1:
+        self.stdout.write(f"  {model._meta.label}: up to pk {last_pk}, {purged} purged")
+      if options['sleep']:
+        time.sleep(options['sleep'])
+    return purged, skipped
+
+  def purge_rows(self, model, pks, using, content_type, comment_models, options):
+    """
+    Archive and delete the rows with primary keys pks in one transaction.
+
+    The archive is written and flushed before the delete, so a failing write
+    aborts it. When the delete fails, the archived lines are removed again.
+    """
+    with transaction.atomic(using=using):
+      archived = None
+      if options['archive']:
+        rows = serializers.serialize('jsonl', model._base_manager.using(using).filter(pk__in=pks))
+        archived = self.archive(model, rows, options['archive'])
+      try:
+        for comment_model in comment_models:
+          comment_model._base_manager.using(using).filter(content_type=content_type, object_id__in=pks).delete()
+        model._base_manager.using(using).filter(pk__in=pks).delete()
+      except BaseException:
+        if archived is not None:
+          self.truncate_archive(model, options['archive'], archived)
+        raise
+
+  def get_archive_path(self, model, directory):
+    """ Return the path of the JSON lines archive of model. """
+    return os.path.join(directory, f"{model._meta.label_lower}.jsonl")
+
+  def archive(self, model, rows, directory):
+    """
+    Append serialized rows to <directory>/<app_label>.<model>.jsonl.
+
+    Returns:
+      int: the size of the archive before the rows were appended.
+    """
+    with open(self.get_archive_path(model, directory), 'a', encoding='utf-8') as archive:
+      size = archive.tell()
+      archive.write(rows)
+      archive.flush()
+      os.fsync(archive.fileno())
+    return size
+
+  def truncate_archive(self, model, directory, size):
+    """ Cut the archive back to size, dropping rows that were not deleted. """
+    with open(self.get_archive_path(model, directory), 'r+', encoding='utf-8') as archive:
+      archive.truncate(size)
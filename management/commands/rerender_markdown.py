@@ -0,0 +1,78 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from cmnsd.models.MarkdownCache import MarkdownCacheMixin, render_markdown
+
+
+class Command(BaseCommand):
+  help = (
+    "Regenerate the stored HTML of all models using MarkdownCacheMixin, e.g. after "
+    "changing MARKDOWN_EXTENSIONS. Changed rows are written with bulk_update()."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+                        help="Limit to these models. Default: all models using MarkdownCacheMixin.")
+    parser.add_argument('--batch-size', type=int, default=200,
+                        help="Number of rows read and written per batch.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only report the number of rows that would change.")
+
+  def handle(self, *args, **options):
+    if options['batch_size'] < 1:
+      raise CommandError("--batch-size must be at least 1")
+    total = 0
+    for model in self.get_models(options['models']):
+      if not model.markdown_fields:
+        continue
+      started = time.monotonic()
+      changed = self.rerender(model, options)
+      total += changed
+      action = 'would change' if options['dry_run'] else 'changed'
+      self.stdout.write(f"{model._meta.label}: {changed} rows {action} in {time.monotonic() - started:.1f}s")
+    self.stdout.write(self.style.SUCCESS(f"Total: {total} rows {'would change' if options['dry_run'] else 'changed'}"))
+
+  def get_models(self, labels):
+    """ Return the concrete models using MarkdownCacheMixin. """
+    if labels:
+      try:
+        models = [apps.get_model(label) for label in labels]
+      except (LookupError, ValueError) as e:
+        raise CommandError(str(e))
+    else:
+      models = apps.get_models()
+    return [
+      model for model in models
+      if issubclass(model, MarkdownCacheMixin) and not model._meta.proxy
+    ]
+
+  def rerender(self, model, options):
+    """ Render all markdown fields of one model and write the rows whose HTML changed. """
+    fields = list(model.markdown_fields.items())
+    targets = [target for source, target in fields]
+    changed = 0
+    batch = []
+    queryset = model._base_manager.only('pk', *model.markdown_fields.keys(), *targets).order_by('pk')
+    for obj in queryset.iterator(chunk_size=options['batch_size']):
+      dirty = False
+      for source, target in fields:
+        html = render_markdown(getattr(obj, source))
+        if getattr(obj, target) != html:
+          setattr(obj, target, html)
+          dirty = True
+      if not dirty:
+        continue
+      batch.append(obj)
+      if len(batch) >= options['batch_size']:
+        changed += self.write(model, batch, targets, options)
+        batch = []
+    if batch:
+      changed += self.write(model, batch, targets, options)
+    return changed
+
+  def write(self, model, batch, targets, options):
+    if not options['dry_run']:
+      model._base_manager.bulk_update(batch, targets, batch_size=options['batch_size'])
+    return len(batch)
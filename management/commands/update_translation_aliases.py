@@ -0,0 +1,127 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cmnsd.models.TranslationAliasMixin import TranslationAliasMixin
+
+
+def _init_worker():
+  # Worker processes started with 'spawn' need their own app registry
+  import django
+  if not apps.ready:
+    django.setup()
+
+
+def translate_names(languages, names):
+  """
+  Translate all names with the catalog of each language. Each catalog is
+  loaded once and reused for all names.
+
+  Returns:
+    dict: {lang_code: {name: translated}}
+  """
+  from django.utils.translation import trans_real
+  result = {}
+  for lang_code in languages:
+    catalog = trans_real.translation(lang_code)
+    result[lang_code] = {name: catalog.gettext(name) for name in names}
+  return result
+
+
+class Command(BaseCommand):
+  help = (
+    "Refresh the aliases of all models using TranslationAliasMixin. All distinct names "
+    "are translated once per language and changed rows are written with bulk_update()."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+                        help="Limit the update to these models. Default: all models using TranslationAliasMixin.")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Number of processes to spread the languages across.")
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help="Number of rows read and written per batch.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only report the number of rows that would change.")
+
+  def handle(self, *args, **options):
+    if options['batch_size'] < 1 or options['jobs'] < 1:
+      raise CommandError("--batch-size and --jobs must be at least 1")
+    models = self.get_models(options['models'])
+    if not models:
+      self.stdout.write("No models use TranslationAliasMixin")
+      return
+    languages = [lang_code for lang_code, _ in settings.LANGUAGES]
+
+    # Translate all distinct names of all models in one pass
+    started = time.monotonic()
+    names = set()
+    for model in models:
+      names.update(model._default_manager.exclude(name='').values_list('name', flat=True).distinct())
+    translations = self.translate(languages, sorted(names), options['jobs'])
+    self.stdout.write(f"Translated {len(names)} names into {len(languages)} languages in {time.monotonic() - started:.1f}s")
+
+    aliases = {
+      name: TranslationAliasMixin.build_aliases(name, (translations[lang_code][name] for lang_code in languages))
+      for name in names
+    }
+    total = 0
+    for model in models:
+      started = time.monotonic()
+      changed = self.update_model(model, aliases, options)
+      total += changed
+      action = 'would change' if options['dry_run'] else 'changed'
+      self.stdout.write(f"{model._meta.label}: {changed} rows {action} in {time.monotonic() - started:.1f}s")
+    self.stdout.write(self.style.SUCCESS(f"Total: {total} rows {'would change' if options['dry_run'] else 'changed'}"))
+
+  def get_models(self, labels):
+    """ Return the concrete models using TranslationAliasMixin. """
+    if labels:
+      try:
+        models = [apps.get_model(label) for label in labels]
+      except (LookupError, ValueError) as e:
+        raise CommandError(str(e))
+    else:
+      models = apps.get_models()
+    return [
+      model for model in models
+      if issubclass(model, TranslationAliasMixin) and not model._meta.proxy
+    ]
+
+  def translate(self, languages, names, jobs):
+    """ Translate names for all languages, spreading languages across processes when jobs > 1. """
+    jobs = min(jobs, len(languages))
+    if jobs <= 1:
+      return translate_names(languages, names)
+    result = {}
+    chunks = [languages[i::jobs] for i in range(jobs)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+      for translated in executor.map(translate_names, chunks, [names] * jobs):
+        result.update(translated)
+    return result
+
+  def update_model(self, model, aliases, options):
+    """ Write changed aliases of one model in batches. Returns the number of changed rows. """
+    changed = 0
+    batch = []
+    queryset = model._default_manager.only('pk', 'name', 'aliases').order_by('pk')
+    for obj in queryset.iterator(chunk_size=options['batch_size']):
+      value = aliases.get(obj.name, '')
+      if obj.aliases == value:
+        continue
+      obj.aliases = value
+      batch.append(obj)
+      if len(batch) >= options['batch_size']:
+        changed += self.write(model, batch, options)
+        batch = []
+    if batch:
+      changed += self.write(model, batch, options)
+    return changed
+
+  def write(self, model, batch, options):
+    if not options['dry_run']:
+      model._default_manager.bulk_update(batch, ['aliases'], batch_size=options['batch_size'])
+    return len(batch)
@@ -564,4 +564,52 @@ class FilterMixin(
       return queryset.none()
     return queryset.distinct()
   
-  
\ No newline at end of file
+  
+  def is_readable(self, obj, request=None):
+    """
+    Apply the rules of filter(), without search, to a loaded object.
+
+    Uses BaseModel.is_status_visible_to() and VisibilityModel.filter_visible_to(),
+    the in-memory counterparts of filter_status() and filter_visibility(), so
+    no query runs, except one for family visibility.
+
+    Args:
+      obj: A model instance.
+      request: The request whose user reads obj. Default: self.request.
+
+    Returns:
+      Optional[bool]: Whether filter() would keep obj, or None when the view
+      or the model overrides one of the filters and only the query can decide.
+    """
+    from cmnsd.models.BaseModel import BaseModel
+    from cmnsd.models.VisibilityModel import VisibilityModel
+    for name, owner in [('filter', FilterMixin), ('_filter_by_restrict_access', FilterAccessMixin),
+                        ('filter_status', FilterStatusVisibilityMixin), ('filter_visibility', FilterStatusVisibilityMixin)]:
+      if getattr(type(self), name) is not getattr(owner, name):
+        return None
+    request = request or getattr(self, 'request', None)
+    user = getattr(request, 'user', None) if request else None
+    model = type(obj)
+    field_names = [f.name for f in model._meta.get_fields()]
+    if getattr(model, 'RESTRICT_READ_ACCESS', None) == 'user':
+      if user is None or not user.is_authenticated or obj.user_id != user.pk:
+        return False
+    if hasattr(model, 'filter_status'):
+      if not self.__is_stock(model, 'filter_status', BaseModel):
+        return None
+      if not obj.is_status_visible_to(user):
+        return False
+    elif 'status' in field_names and obj.status != 'p':
+      return False
+    if 'visibility' in field_names:
+      if hasattr(model, 'filter_visibility'):
+        if not self.__is_stock(model, 'filter_visibility', VisibilityModel):
+          return None
+        return bool(model.filter_visible_to(user, [obj]))
+      return obj.visibility == 'p'
+    return True
+
+  @staticmethod
+  def __is_stock(model, name, owner):
+    """ Return True if the classmethod name of model is the one defined on owner. """
+    return getattr(getattr(model, name), '__func__', None) is getattr(owner, name).__func__
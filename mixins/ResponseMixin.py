@@ -1,14 +1,96 @@
+from django.apps import apps
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.http import JsonResponse
-from django.template.loader import render_to_string
+from django.template.loader import get_template, render_to_string
+from django.utils.autoreload import file_changed
+from django.utils.cache import patch_vary_headers
 from django.utils.translation import gettext_lazy as _
 from django.template.exceptions import TemplateDoesNotExist
 from django.db.models.query import QuerySet
 from django.db import models
 
+import hashlib
+import threading
 import traceback
 import json
 
+from cmnsd.loaders.minify import minify_fragment, is_minified_template
+from cmnsd.models.ObjectCache import get_object_cache_info
+from cmnsd.models.IdentityMap import get_identity_map
+
+''' Resolved template cache
+    Maps a tuple of candidate template names (which encodes model, field,
+    format and field-or-function) to the index of the first candidate that
+    exists, or None when none exists and the string value is used.
+'''
+_template_cache = {}
+_template_cache_stats = {'hits': 0, 'misses': 0}
+_template_cache_lock = threading.Lock()
+
+def resolve_template_index(template_names):
+  """ Return the index of the first existing template in template_names, or None. Cached per process. """
+  key = tuple(template_names)
+  with _template_cache_lock:
+    if key in _template_cache:
+      _template_cache_stats['hits'] += 1
+      return _template_cache[key]
+    _template_cache_stats['misses'] += 1
+  index = None
+  for i, template in enumerate(template_names):
+    try:
+      get_template(template)
+    except TemplateDoesNotExist:
+      continue
+    except Exception:
+      # Exists but fails to load; render() reports the error
+      pass
+    index = i
+    break
+  with _template_cache_lock:
+    _template_cache[key] = index
+  return index
+
+def get_template_cache_info():
+  """ Return the size, hits, misses and hit rate of the resolved template cache. """
+  with _template_cache_lock:
+    lookups = _template_cache_stats['hits'] + _template_cache_stats['misses']
+    return {
+      'size': len(_template_cache),
+      'hits': _template_cache_stats['hits'],
+      'misses': _template_cache_stats['misses'],
+      'hit_rate': round(_template_cache_stats['hits'] / lookups, 3) if lookups else None,
+    }
+
+def clear_template_cache():
+  with _template_cache_lock:
+    _template_cache.clear()
+    _template_cache_stats.update(hits=0, misses=0)
+
+FRAGMENT_HASHES_HEADER = 'X-Fragment-Hashes'
+
+def fragment_hash(value):
+  """ Return the hash of a rendered fragment as sent in fragment_hashes. """
+  return hashlib.blake2b(value.encode('utf-8'), digest_size=8).hexdigest()
+
+class RenderedFragment(str):
+  ''' Rendered template output whose whitespace is already processed by render() '''
+  pass
+
+@receiver(file_changed)
+def _reset_template_cache_on_change(sender, file_path, **kwargs):
+  # Templates added, removed or edited while the development server runs.
+  # Returns None so Django's own template reload handling is not affected.
+  from django.template.autoreload import get_template_directories
+  if file_path.suffix != '.py' and any(directory in file_path.parents for directory in get_template_directories()):
+    clear_template_cache()
+
+@receiver(setting_changed)
+def _reset_template_cache_on_setting(setting, **kwargs):
+  if setting in ['TEMPLATES', 'INSTALLED_APPS']:
+    clear_template_cache()
+
 
 class ResponseMixin(object):
   def __init__(self):
@@ -43,15 +125,34 @@ class ResponseMixin(object):
     if payload:
       if isinstance(payload, dict):
         # if payload is a dict, strip all string values and remove empty lines
+        # Rendered fragments were minified by render(); clean up other strings
         payload = {
           key: (
             "\n".join(line for line in value.splitlines() if line.strip()).strip()
-            if isinstance(value, str)
+            if isinstance(value, str) and not isinstance(value, RenderedFragment)
             else value
           )
           for key, value in payload.items()
         }
+    ''' Omit fragments the client already shows '''
+    client_hashes = self._get_client_fragment_hashes()
+    if client_hashes is not None and isinstance(payload, dict):
+      response_data["not_modified"] = []
+      response_data["fragment_hashes"] = {}
+      for key, value in list(payload.items()):
+        if not isinstance(value, str):
+          continue
+        value_hash = fragment_hash(value)
+        if client_hashes.get(key) == value_hash:
+          del payload[key]
+          response_data["not_modified"].append(key)
+        else:
+          response_data["fragment_hashes"][key] = value_hash
+    if payload:
       response_data["payload"] = payload
+    ''' Position of windowed field reads '''
+    if getattr(self, 'field_windows', None):
+      response_data["windows"] = self.field_windows
     ''' When other arguments are passed when calling return_response,
         they will be added to the response as well.
     '''
@@ -74,6 +175,8 @@ class ResponseMixin(object):
         "fields": str(obj.fields) if obj and hasattr(obj, 'fields') else None,
         "mode": str(self.modes) if hasattr(self, 'modes') else False,
         "debug": settings.DEBUG,
+        "template_cache": get_template_cache_info(),
+        "object_cache": get_object_cache_info(),
         
         "request_user": {
           "id": self.request.user.id,
@@ -100,7 +203,10 @@ class ResponseMixin(object):
       for key, value in self.request.POST.items():
         response_data['__meta']['request']['post_' + key] = value
     try:
-      return JsonResponse(response_data, status=self.status)
+      response = JsonResponse(response_data, status=self.status)
+      if client_hashes is not None:
+        patch_vary_headers(response, [FRAGMENT_HASHES_HEADER])
+      return response
     except TypeError as e:
       if getattr(settings, "DEBUG", False):
         traceback.print_exc()
@@ -117,13 +223,30 @@ class ResponseMixin(object):
       response_data["messages"].append(self.__render_message(self._get_messages()[-1]))
       return JsonResponse(str(response_data), status=self.status)
     
-  def render(self, field=None, template_names=[], format='html', context={}):
+  def _get_client_fragment_hashes(self):
+    ''' Return the {payload key: hash} sent by the client in X-Fragment-Hashes, or None. '''
+    header = self.request.headers.get(FRAGMENT_HASHES_HEADER)
+    if header is None:
+      return None
+    try:
+      hashes = json.loads(header) if header.strip() else {}
+    except json.JSONDecodeError:
+      return None
+    return hashes if isinstance(hashes, dict) else None
+
+  def render(self, field=None, template_names=[], format='html', context={}, serialize=None):
+    ''' Render the first existing template of template_names.
+        For format=json, serialize (a queryset or object) is serialized from
+        its model's ajax_json_fields when no template exists or the model
+        sets ajax_json_native.
+    '''
     ''' In-function configuration '''
     remove_newlines = getattr(settings, 'AJAX_RENDER_REMOVE_NEWLINES', False)
+    preserve_text = False
     try:
       if isinstance(self.obj.model._meta.get_field(field), models.TextField):
-        # For TextField fields, do not remove newlines to preserve formatting
-        remove_newlines = False
+        # For TextField fields, do not touch whitespace to preserve formatting
+        preserve_text = True
     except Exception:
       pass
     ''' Add request and permissions to context '''
@@ -135,10 +258,20 @@ class ResponseMixin(object):
     rendered_field = ''
     if getattr(settings, 'DEBUG', False) and self.request.user.is_staff:
       print(template_names)
-    for template in template_names:
+    # Start at the first template known to exist; skip the loader walk for missing ones
+    index = resolve_template_index(template_names)
+    if format == 'json' and serialize is not None:
+      # Imported here: cmnsd.views imports this module
+      from cmnsd.views.ajax_utils_serializer import has_json_serializer, prefers_json_serializer, serialize_value
+      serialize_model = serialize.model if isinstance(serialize, QuerySet) else serialize.__class__
+      if has_json_serializer(serialize_model) and (index is None or prefers_json_serializer(serialize_model)):
+        return serialize_value(serialize)
+    for template in ([] if index is None else template_names[index:]):
+      compiled = None
       try:
         # print("Context in render:", context)
-        rendered_field = render_to_string(template, context=context, request=self.request)
+        compiled = get_template(template)
+        rendered_field = compiled.render(context, request=self.request)
         if getattr(settings, 'DEBUG', False) and self.request.user.is_staff:
           print(f"Rendered template: {template}")
       except TemplateDoesNotExist:
@@ -153,13 +286,15 @@ class ResponseMixin(object):
       try:
         if format == 'json':
           rendered_field = json.loads(rendered_field)
-        # Remove newlines, tabs and extra spaces if configured
-        if remove_newlines and \
-          isinstance(rendered_field, str):
-          if not field or not isinstance(getattr(self.obj.obj, field), models.TextField):
-            rendered_field = rendered_field.replace('\n', '').replace('\r', '').replace('\t', '')
-            while '  ' in rendered_field:
-              rendered_field = rendered_field.replace('  ', ' ')
+        if isinstance(rendered_field, str):
+          # Remove newlines, tabs and extra spaces if configured, otherwise blank lines.
+          # Templates minified by cmnsd.loaders.minify.Loader need no pass per request,
+          # unless blank lines left by template tags are still to be removed.
+          if is_minified_template(compiled) and (remove_newlines or preserve_text):
+            rendered_field = rendered_field.strip()
+          elif not preserve_text:
+            rendered_field = minify_fragment(rendered_field, remove_newlines=remove_newlines)
+          rendered_field = RenderedFragment(rendered_field)
         return rendered_field
       except json.JSONDecodeError as e:
         if getattr(settings, 'DEBUG', False) and self.request.user.is_staff:
@@ -178,6 +313,9 @@ class ResponseMixin(object):
     self._add_message(_("{} template for '{}:{}' not found in field/ when rendering field").format(format, self.model.name, field).capitalize() + staff_message, "debug")
     if not field or not hasattr(self.obj, field):
       return ''
+    # The filtered (and windowed) value prepared by render_field
+    if 'field_value' in context:
+      return context['field_value']
     return str(getattr(self.obj, field).value())
 
   def render_field(self, field, format='html', context={}):
@@ -197,6 +335,12 @@ class ResponseMixin(object):
       raise ValueError(_("unexpected error retrieving field '{}' from {} '{}': {}".format(field, self.model.name, self.obj, str(e))).capitalize())
     if hasattr(value, 'value') and callable(value.value):
       value = value.value()
+    ''' Load generic comment relations in one query, with owners; targets are set below '''
+    comment_model = self._get_generic_comment_model(field)
+    window_limit = self._get_window_limit()
+    if comment_model:
+      # Filtered below with the other related fields when this view filters
+      value = comment_model.get_queryset_for(self.obj.obj, request=self.request, filtered=not hasattr(self, 'filter'))
     ''' Build template names to try to render '''
     template_names = [
       f'object/{ self.model.name.lower() }_{ field }.{ format }',
@@ -227,10 +371,24 @@ class ResponseMixin(object):
     ''' Filter Queryset Results '''
     if isinstance(value, QuerySet) and hasattr(self, 'filter'):
       value = self.filter(value)
+    ''' Render one window of large related fields (?limit=, ?after=) '''
+    if isinstance(value, QuerySet) and window_limit:
+      # Imported here: cmnsd.views imports this module
+      from cmnsd.views.ajax_utils_window import window_queryset
+      value, window = window_queryset(value, window_limit, after=self._get_window_cursor(field), evaluate=get_identity_map(self.request).evaluate)
+      self.field_windows = getattr(self, 'field_windows', {}) | {field: window}
+    # Evaluate once for field_value and the template, reusing rows loaded in this request
+    if isinstance(value, QuerySet) and not (format == 'json' and self._uses_json_serializer(value.model)):
+      value = get_identity_map(self.request).evaluate(value)
+      if comment_model:
+        # The target of every comment is this object; skip a query per comment
+        for comment in value:
+          comment.content_object = self.obj.obj
     ''' Build rendering context '''
     context = context | {
       'field_name': field,
       'field_value': str(value),
+      'field_value_raw': value,
       field: value,
       'format': format,
       'model': self.model.name,
@@ -238,8 +396,50 @@ class ResponseMixin(object):
       'q': self.request.GET.get(getattr(settings, 'SEARCH_QUERY_CHARACTER', 'q')),
       self.model.name: self.obj.obj,
     }
-    return self.render(field=field, template_names=template_names, format=format, context=context)
+    serialize = value if isinstance(value, (QuerySet, models.Model)) else None
+    return self.render(field=field, template_names=template_names, format=format, context=context, serialize=serialize)
   
+  def _get_window_limit(self):
+    ''' Return the number of related rows requested with ?limit=, at most AJAX_WINDOW_MAX_LIMIT, or None '''
+    limit = self.get_value_from_request('limit', silent=True)
+    if limit in (None, ''):
+      return None
+    try:
+      limit = int(limit)
+    except (TypeError, ValueError):
+      raise ValueError(_("limit '{}' is not a number").format(limit).capitalize())
+    return max(1, min(limit, getattr(settings, 'AJAX_WINDOW_MAX_LIMIT', 100)))
+
+  def _get_window_cursor(self, field):
+    ''' Return the cursor of field: after[<field>], an 'after' object keyed by field (JSON), or 'after' when one field is read '''
+    after = self.get_value_from_request(f'after[{ field }]', silent=True)
+    if after is not None:
+      return after or None
+    after = self.get_value_from_request('after', silent=True)
+    if isinstance(after, dict):
+      return after.get(field) or None
+    if not after:
+      return None
+    if len(getattr(self.obj, 'fields', [])) + len(getattr(self.obj, 'functions', [])) > 1:
+      raise ValueError(_("pass the cursor of each field as after[<field>] when reading more than one field").capitalize())
+    return after
+
+  def _uses_json_serializer(self, model):
+    # Imported here: cmnsd.views imports this module
+    from cmnsd.views.ajax_utils_serializer import has_json_serializer
+    return has_json_serializer(model)
+
+  def _get_generic_comment_model(self, field):
+    ''' Return the comment model if field is a GenericRelation to a BaseComment model '''
+    if not apps.is_installed('django.contrib.contenttypes') or not self.model.has_field(field):
+      return None
+    from django.contrib.contenttypes.fields import GenericRelation
+    from cmnsd.models.Comment import BaseComment
+    model_field = self.model.model._meta.get_field(field)
+    if isinstance(model_field, GenericRelation) and issubclass(model_field.related_model, BaseComment):
+      return model_field.related_model
+    return None
+
   def render_obj(self, obj, format='html', context={}):
     ''' Ignore empty object '''
     if not obj or not obj.obj:
@@ -265,7 +465,7 @@ class ResponseMixin(object):
         template_names.insert(0, f'{ getattr(self.obj.obj, 'ajax_template_name') }.{ format }')
     except Exception:
       pass
-    return self.render(field=None, template_names=template_names, format=format, context=context)
+    return self.render(field=None, template_names=template_names, format=format, context=context, serialize=obj.obj)
   def render_object(self, obj, format='html', context={}):
     ''' Alias for render_obj '''
     return self.render_obj(obj, format=format, context=context)
@@ -311,7 +511,7 @@ class ResponseMixin(object):
       mapping = getattr(model.model, 'get_filter_mapping', lambda: {})()
       object_list = self.filter(object_list, mapping=mapping, request=self.request)
     context[model_name] = object_list
-    return self.render(field=None, template_names=template_names, format=format, context=context)
+    return self.render(field=None, template_names=template_names, format=format, context=context, serialize=object_list)
   
   def __render_message(self, message):
     ''' Render message via template if available '''
@@ -1,4 +1,5 @@
 import functools
+import hashlib
 
 def ajax_login_required(func):
   """
@@ -15,11 +16,111 @@ def ajax_login_required(func):
   wrapper.is_ajax_callable = True
   return wrapper
 
-def ajax_function(func):
-  """Marks a model method as callable via AJAX."""
+def ajax_function(func=None, cache_ttl=None, vary_on=('user', 'language'), depends_on=()):
+  """
+  Marks a model method as callable via AJAX.
+
+  With cache_ttl, results returned to the AJAX views are kept in the shared
+  cache (AJAX_FUNCTION_CACHE_ALIAS) for that many seconds. Entries are keyed
+  by the object's version, the required arguments taken from the request,
+  and vary_on; they expire when the object or one of the depends_on models
+  is written.
+
+    @ajax_function(cache_ttl=300, vary_on=('user', 'radius'), depends_on=['locations.Location'])
+    def nearby(self, radius):
+      ...
+
+  Args:
+    cache_ttl (int): Seconds to keep results; None disables caching.
+    vary_on (iterable): 'user', 'language' and/or names of request values.
+      Results are shared between users when 'user' is left out.
+    depends_on (iterable): Models (classes or 'app_label.Model' labels)
+      whose writes invalidate the results.
+  """
+  if func is None:
+    return lambda func: ajax_function(func, cache_ttl=cache_ttl, vary_on=vary_on, depends_on=depends_on)
   func.is_ajax_callable = True
+  if cache_ttl:
+    func.ajax_cache = {
+      'ttl': cache_ttl,
+      'vary_on': tuple([vary_on] if isinstance(vary_on, str) else vary_on),
+      'depends_on': tuple([depends_on] if isinstance(depends_on, (str, type)) else depends_on),
+    }
   return func
 
+def _get_result_cache():
+  from django.conf import settings
+  from django.core.cache import caches
+  return caches[getattr(settings, 'AJAX_FUNCTION_CACHE_ALIAS', 'default')]
+
+def get_cached_function_result(key):
+  """ Return (True, result) for a stored result of get_function_cache_key(), or (False, None). """
+  if not key:
+    return False, None
+  entry = _get_result_cache().get(key)
+  return (True, entry[0]) if entry is not None else (False, None)
+
+def cache_function_result(key, func, result):
+  """ Store a result under a key of get_function_cache_key(). Results that cannot be pickled are not stored. """
+  if not key:
+    return
+  try:
+    # Wrapped, so a result of None is stored as well
+    _get_result_cache().set(key, (result,), get_function_cache(func)['ttl'])
+  except Exception:
+    pass
+
+def get_function_cache(func):
+  """ Return the cache options of an @ajax_function, or None if its results are not cached. """
+  return getattr(func, 'ajax_cache', None)
+
+def get_cached_function_models():
+  """ Return the installed models with cached @ajax_functions and the models these depend on. """
+  from django.apps import apps
+  models = set()
+  for model in apps.get_models():
+    for klass in model.__mro__:
+      for value in vars(klass).values():
+        options = get_function_cache(value)
+        if options:
+          models.add(model)
+          models.update(apps.get_model(dependency) if isinstance(dependency, str) else dependency for dependency in options['depends_on'])
+  return models
+
+def get_function_cache_key(obj, func, args, request=None):
+  """
+  Return the shared cache key for a call of a cached @ajax_function on obj
+  with the required arguments args, or None if it is not cached.
+  """
+  from django.apps import apps
+  from django.utils import translation
+  from cmnsd.models.ObjectCache import get_version
+  options = get_function_cache(func)
+  if not options or obj is None or obj.pk is None:
+    return None
+  versions = [get_version(obj.__class__, obj.pk)]
+  for model in options['depends_on']:
+    versions.append(get_version(apps.get_model(model) if isinstance(model, str) else model))
+  if None in versions:
+    # Without version tokens, writes could not expire the results
+    return None
+  varies = []
+  for name in options['vary_on']:
+    if name == 'user':
+      user = getattr(request, 'user', None)
+      varies.append(('user', user.pk if user is not None and user.is_authenticated else None))
+    elif name == 'language':
+      varies.append(('language', translation.get_language()))
+    else:
+      value = (request.GET.get(name) or request.POST.get(name)) if request is not None else None
+      varies.append((name, value))
+  signature = repr((sorted(args.items()), varies)).encode('utf-8')
+  return 'cmnsd:function:{}:{}:{}:{}:{}'.format(
+    obj._meta.label_lower, obj.pk, func.__name__,
+    hashlib.blake2b(':'.join(versions).encode('utf-8'), digest_size=8).hexdigest(),
+    hashlib.blake2b(signature, digest_size=12).hexdigest(),
+  )
+
 def searchable_function(func):
   """Marks a model method as searchable."""
   func.is_searchable = True
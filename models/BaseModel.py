@@ -1,10 +1,11 @@
-from django.db import models
+from django.db import models, transaction, router, connections, IntegrityError
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.urls import reverse
 from django.core.exceptions import ValidationError
 
 import string, secrets
+from contextlib import nullcontext
 from inspect import getmembers, isfunction
 
 # ================================================================
@@ -17,6 +18,71 @@ def generate_public_id(length=10):
     alphabet = string.ascii_letters + string.digits
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
+# Number of attempts to find a free token before giving up. After half of
+# the attempts, longer tokens are generated to make a collision unlikely.
+TOKEN_ATTEMPTS = 10
+
+def _token_for_attempt(attempt):
+  return generate_public_id(15 if attempt >= TOKEN_ATTEMPTS // 2 else 10)
+
+# ================================================================
+# BaseQuerySet / BaseManager:
+# Default manager for BaseModel, adds batch-safe token allocation.
+# ================================================================
+class BaseQuerySet(models.QuerySet):
+
+  def bulk_create_with_tokens(self, objs, **kwargs):
+    """
+    Insert objects with bulk_create(), making sure every object has a free token.
+
+    Tokens are generated for objects without one. All tokens of the batch are
+    checked against the database in a single ``token__in`` query; only tokens
+    that already exist, or appear twice in the batch, are regenerated and
+    checked again.
+
+    Args:
+      objs (iterable): Unsaved model instances.
+      **kwargs: Passed to ``bulk_create()`` (e.g. ``batch_size``).
+
+    Returns:
+      list: The created objects, as returned by ``bulk_create()``.
+
+    Raises:
+      IntegrityError: If no free token could be found for every object.
+
+    Notes:
+      - Explicitly set tokens that collide are replaced as well.
+      - As with ``bulk_create()``, model ``save()`` methods and signals are not called.
+    """
+    objs = list(objs)
+    pending = objs
+    seen = set()
+    for attempt in range(TOKEN_ATTEMPTS):
+      for obj in pending:
+        if not obj.token:
+          obj.token = generate_public_id()
+      existing = set(
+        self.model._base_manager.using(self.db)
+        .filter(token__in=[obj.token for obj in pending])
+        .values_list('token', flat=True)
+      )
+      colliding = []
+      for obj in pending:
+        if obj.token in existing or obj.token in seen:
+          colliding.append(obj)
+        else:
+          seen.add(obj.token)
+      if not colliding:
+        break
+      for obj in colliding:
+        obj.token = _token_for_attempt(attempt)
+      pending = colliding
+    else:
+      raise IntegrityError(_("could not allocate unique tokens for {} {}").format(len(pending), self.model._meta.verbose_name_plural).capitalize())
+    return self.bulk_create(objs, **kwargs)
+
+BaseManager = models.Manager.from_queryset(BaseQuerySet)
+
 # ================================================================
 # BaseModel:
 # Abstract base model with common fields and methods for all models.
@@ -63,16 +129,37 @@ class BaseModel(models.Model):
     related_name="%(class)s_created_by",
   )
 
+  objects = BaseManager()
+
   # ================================================================
   # Internal Methods
   # ================================================================
-  def _generate_unique_public_id(self):
-    """Try multiple times to avoid collisions."""
-    for _ in range(10):
-      pid = generate_public_id()
-      if not self.__class__.objects.filter(token=pid).exists():
-        return pid
-    return generate_public_id(15)
+  def _insert_with_token_retry(self, *args, **kwargs):
+    """
+    Insert the object, assuming the token is free. When the insert fails
+    and the token turns out to be taken, generate a new token and retry.
+    Inside a transaction, each attempt runs in a savepoint so a failed
+    insert does not break the surrounding transaction.
+    """
+    using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+    for attempt in range(TOKEN_ATTEMPTS):
+      savepoint = transaction.atomic(using=using) if connections[using].in_atomic_block else nullcontext()
+      try:
+        with savepoint:
+          return super().save(*args, **kwargs)
+      except IntegrityError:
+        if not self.__class__._base_manager.using(using).filter(token=self.token).exists():
+          raise
+        self.token = _token_for_attempt(attempt)
+    raise IntegrityError(_("could not allocate a unique token for {}").format(self._meta.verbose_name).capitalize())
+
+  def _get_loaded_values(self):
+    """Return the concrete column values currently held by the instance."""
+    return {
+      f.attname: self.__dict__[f.attname]
+      for f in self._meta.concrete_fields
+      if f.attname in self.__dict__
+    }
 
   # ================================================================
   # Model Methods
@@ -80,11 +167,58 @@ class BaseModel(models.Model):
   class Meta:
     abstract = True
   
+  @classmethod
+  def from_db(cls, db, field_names, values):
+    """Remember the loaded column values so changed fields can be detected."""
+    instance = super().from_db(db, field_names, values)
+    instance._loaded_values = {
+      name: value for name, value in zip(field_names, values)
+      if value is not models.DEFERRED
+    }
+    return instance
+
+  def get_dirty_fields(self):
+    """
+    Return the names of concrete fields whose value differs from the
+    value that was loaded from the database. Unsaved instances report
+    all concrete non-primary-key fields as dirty.
+    """
+    loaded = getattr(self, '_loaded_values', None)
+    if loaded is None or not self.pk:
+      return [f.name for f in self._meta.concrete_fields if not f.primary_key]
+    return [
+      f.name for f in self._meta.concrete_fields
+      if f.attname in loaded and f.attname in self.__dict__
+      and self.__dict__[f.attname] != loaded[f.attname]
+    ]
+
+  def _add_update_fields(self, kwargs, before):
+    """
+    Add the columns a save() override changed to update_fields in kwargs,
+    when save() was called with update_fields. before holds the values from
+    _get_loaded_values() taken at the start of the override.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None:
+      return
+    changed = [
+      f.name for f in self._meta.concrete_fields
+      if f.attname in before and self.__dict__.get(f.attname) != before[f.attname]
+    ]
+    kwargs['update_fields'] = list(dict.fromkeys(list(update_fields) + changed))
+
   def save(self, *args, **kwargs):
-    """Automatically assign a unique token if missing."""
+    """
+    Automatically assign a token if missing. New objects are inserted
+    optimistically and get a new token only if the insert collides.
+    """
     if not self.token:
-      self.token = self._generate_unique_public_id()
-    super().save(*args, **kwargs)
+      self.token = generate_public_id()
+    if self._state.adding and not kwargs.get('update_fields'):
+      self._insert_with_token_retry(*args, **kwargs)
+    else:
+      super().save(*args, **kwargs)
+    self._loaded_values = self._get_loaded_values()
     
   def __str__(self):
     return getattr(self, 'name', f"{self.__class__.__name__} ({self.pk})")
@@ -116,6 +250,37 @@ class BaseModel(models.Model):
   def disallow_access_fields(self):
     return ['id', 'slug', 'date_created', 'date_modified']
 
+  # ================================================================
+  # Class Methods for Index Presets
+  # ================================================================
+  @classmethod
+  def index_presets(cls, prefix='%(app_label)s_%(class)s', partial=True):
+    """
+    Return opt-in indexes for the predicates the AJAX dispatch filters and
+    sorts on. Use in the Meta of a concrete model:
+
+      class Meta:
+        indexes = BaseModel.index_presets()
+
+    Presets of parent classes in the MRO are included, so calling this on a
+    combined base (e.g. BaseComment) returns all presets for that base.
+
+    Args:
+      prefix (str): Index name prefix. Index names are limited to 30
+                    characters; pass a shorter prefix for long model names.
+      partial (bool): Include partial indexes. Databases without partial
+                      index support skip them.
+
+    Returns:
+      list[models.Index]
+    """
+    parent = getattr(super(), 'index_presets', None)
+    indexes = parent(prefix=prefix, partial=partial) if parent else []
+    return indexes + [
+      models.Index(fields=['status', 'user'], name=f'{prefix}_st_usr'),
+      models.Index(fields=['-date_created'], name=f'{prefix}_created'),
+    ]
+
   # ================================================================
   # Class Methods for Querysets and Searchable Fields
   # ================================================================
@@ -166,3 +331,21 @@ class BaseModel(models.Model):
     else:
       # Unauthenticated users can only see Published
       return queryset.filter(status='p')
+
+  def is_status_visible_to(self, user=None):
+    """
+    Check the status of this object for a user without a query. Mirrors
+    filter_status() on the already-loaded instance, as is_visible_to()
+    mirrors filter_visibility().
+
+    Args:
+      user: A User instance or None (anonymous).
+
+    Returns:
+      bool: True if filter_status() would keep this object.
+    """
+    if user is not None and user.is_authenticated:
+      if user.is_staff:
+        return self.status in ['p', 'c', 'r']
+      return self.status == 'p' or (self.status == 'c' and self.user_id == user.pk)
+    return self.status == 'p'
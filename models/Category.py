@@ -26,7 +26,16 @@ class Category(BaseModel):
       return f"{ self.parent.name }: { self.name }"
     return self.name
   
+  @classmethod
+  def index_presets(cls, prefix='%(app_label)s_%(class)s', partial=True):
+    """ Add indexes for the default ordering (parent__name, name). See BaseModel.index_presets(). """
+    return super().index_presets(prefix=prefix, partial=partial) + [
+      models.Index(fields=['name'], name=f'{prefix}_name'),
+      models.Index(fields=['parent', 'name'], name=f'{prefix}_par_name'),
+    ]
+
   def save(self, *args, **kwargs):
+    before = self._get_loaded_values()
     # Handle Parent Identifiers
     if ':' in self.name:
       parent_name, name = [part.strip() for part in self.name.split(':', 1)]
@@ -36,6 +45,7 @@ class Category(BaseModel):
     # Auto-generate slug from name if not provided
     if not self.slug:
       self.slug = slugify(self.name)
+    self._add_update_fields(kwargs, before)
     super().save(*args, **kwargs)
 
   js_template_name = 'categories'
@@ -7,6 +7,7 @@ from django.utils.translation import gettext_lazy as _
 
 from cmnsd.models.BaseModel import BaseModel
 from cmnsd.models.VisibilityModel import VisibilityModel
+from cmnsd.models.IdentityMap import get_identity_map
 
 
 class BaseComment(BaseModel, VisibilityModel):
@@ -63,12 +64,104 @@ class BaseComment(BaseModel, VisibilityModel):
     ordering = ["-date_created"]
     abstract = True
 
+  @classmethod
+  def index_presets(cls, prefix='%(app_label)s_%(class)s', partial=True):
+    """
+    Add indexes for listing the comments of one object, newest first, and a
+    partial index for the published-public comments. Includes the BaseModel
+    and VisibilityModel presets. See BaseModel.index_presets().
+    """
+    indexes = super().index_presets(prefix=prefix, partial=partial)
+    indexes.append(models.Index(fields=['content_type', 'object_id', '-date_created'], name=f'{prefix}_target'))
+    if partial:
+      indexes.append(models.Index(fields=['content_type', 'object_id', '-date_created'], name=f'{prefix}_target_pub', condition=models.Q(status='p', visibility='p')))
+    return indexes
+
   def save(self, *args, **kwargs):
     # Do not save a comment with no content
     if not self.text.strip():
       raise ValueError("Cannot save a comment with empty text.")
     return super().save(*args, **kwargs)
 
+  @classmethod
+  def prefetch_for(cls, targets, request=None, to_attr=None):
+    """
+    Load the comments of many target objects at once.
+
+    Runs one query per content type. Comments are filtered on status and
+    visibility for the request's user, ordered newest first, and come with
+    their owner (select_related('user')). content_object is filled in from
+    the given targets, so it does not trigger a query per comment. Comments
+    and owners are registered in the identity map of the request, so an
+    owner loaded before (e.g. the request user) is one instance.
+
+    Args:
+      targets (iterable): Model instances, possibly of different models.
+      request (HttpRequest): Used for status and visibility filtering.
+      to_attr (str): Optional attribute name to store each target's list of
+                     comments on, e.g. 'visible_comments'.
+
+    Returns:
+      dict: {target: [comments]} for targets with comments.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    by_model = {}
+    for target in targets:
+      if target is not None and target.pk is not None:
+        by_model.setdefault(type(target), {})[target.pk] = target
+    result = {}
+    if not by_model:
+      return result
+    content_types = ContentType.objects.get_for_models(*by_model.keys())
+    identity_map = get_identity_map(request)
+    for model, objects in by_model.items():
+      queryset = cls._get_visible_comments(content_types[model], list(objects.keys()), request=request)
+      user_field = cls._meta.get_field('user')
+      for row in queryset:
+        comment = identity_map.add(row)
+        if row.user_id is not None:
+          user_field.set_cached_value(comment, identity_map.add(row.user))
+        target = objects[comment.object_id]
+        comment.content_object = target
+        result.setdefault(target, []).append(comment)
+    if to_attr:
+      for objects in by_model.values():
+        for target in objects.values():
+          setattr(target, to_attr, result.get(target, []))
+    return result
+
+  @classmethod
+  def get_queryset_for(cls, target, request=None, filtered=True):
+    """
+    Return the comments of one target as a queryset, with their owners and
+    ordered as prefetch_for() loads them.
+
+    Args:
+      target (Model): The commented object.
+      request (HttpRequest): Used for status and visibility filtering.
+      filtered (bool): Apply filter_status() and filter_visibility(). Pass
+                       False when the caller filters the queryset itself,
+                       e.g. with FilterMixin.filter().
+    """
+    from django.contrib.contenttypes.models import ContentType
+    content_type = ContentType.objects.get_for_model(type(target))
+    if not filtered:
+      return cls._get_comments(content_type, [target.pk])
+    return cls._get_visible_comments(content_type, [target.pk], request=request)
+
+  @classmethod
+  def _get_comments(cls, content_type, object_ids):
+    return cls.objects.filter(
+      content_type=content_type,
+      object_id__in=object_ids,
+    ).select_related('user').order_by('-date_created')
+
+  @classmethod
+  def _get_visible_comments(cls, content_type, object_ids, request=None):
+    queryset = cls._get_comments(content_type, object_ids)
+    queryset = cls.filter_status(queryset, request=request)
+    return cls.filter_visibility(queryset, request=request)
+
   def get_title(self):
     """
     Return the title of the comment, or a truncated preview of the text.
@@ -0,0 +1,174 @@
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Max, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_save, post_delete
+from django.utils.translation import gettext_lazy as _
+
+
+class BaseCommentCounter(models.Model):
+  """
+  Opt-in side table with the number of comments and the date of the latest
+  comment per target object of a BaseComment model.
+
+  Counters are kept up to date from the comment's save and delete signals
+  with F() expressions. Only comments that are published and have one of the
+  COMMENT_COUNTER_VISIBILITIES (default: public) are counted.
+
+  Usage:
+    class CommentCounter(BaseCommentCounter):
+      comment_model = 'locations.Comment'
+
+    Location.objects.all() annotated with comment_count and last_commented_at:
+      CommentCounter.annotate(Location.objects.all())
+
+  Changes that bypass signals (queryset.update(), bulk dispatch requests)
+  are not counted; run CommentCounter.rebuild() afterwards.
+  """
+
+  # app_label.ModelName of the BaseComment model to count. Required.
+  comment_model = None
+
+  content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+  object_id = models.PositiveBigIntegerField()
+  comment_count = models.PositiveIntegerField(default=0)
+  last_commented_at = models.DateTimeField(null=True, blank=True)
+
+  class Meta:
+    abstract = True
+    constraints = [
+      models.UniqueConstraint(fields=['content_type', 'object_id'], name='%(app_label)s_%(class)s_target'),
+    ]
+
+  def __str__(self):
+    return f"{self.content_type} {self.object_id}: {self.comment_count}"
+
+  ''' Configuration '''
+  @classmethod
+  def get_comment_model(cls):
+    if not cls.comment_model:
+      raise ValueError(_("{} does not define comment_model").format(cls.__name__).capitalize())
+    return apps.get_model(cls.comment_model) if isinstance(cls.comment_model, str) else cls.comment_model
+
+  @classmethod
+  def counted_filter(cls):
+    """ Return the Q object for comments that are counted. """
+    return models.Q(status='p', visibility__in=getattr(settings, 'COMMENT_COUNTER_VISIBILITIES', ['p']))
+
+  @classmethod
+  def is_counted(cls, values):
+    """ Return True if a comment with these field values (dict) is counted. """
+    return values.get('status') == 'p' and values.get('visibility') in getattr(settings, 'COMMENT_COUNTER_VISIBILITIES', ['p'])
+
+  ''' Counter updates '''
+  @classmethod
+  def increment(cls, content_type_id, object_id, date):
+    """ Add one comment to the counter of a target. """
+    updated = cls.objects.filter(content_type_id=content_type_id, object_id=object_id).update(
+      comment_count=F('comment_count') + 1,
+      last_commented_at=Greatest(Coalesce(F('last_commented_at'), Value(date)), Value(date)),
+    )
+    if updated:
+      return
+    try:
+      with transaction.atomic():
+        cls.objects.create(content_type_id=content_type_id, object_id=object_id, comment_count=1, last_commented_at=date)
+    except IntegrityError:
+      # Created concurrently, add to the existing row
+      cls.increment(content_type_id, object_id, date)
+
+  @classmethod
+  def decrement(cls, content_type_id, object_id):
+    """ Remove one comment from the counter of a target and recompute the latest date. """
+    last = cls.get_comment_model()._base_manager.filter(
+      cls.counted_filter(), content_type_id=content_type_id, object_id=object_id,
+    ).aggregate(last=Max('date_created'))['last']
+    cls.objects.filter(content_type_id=content_type_id, object_id=object_id, comment_count__gt=0).update(
+      comment_count=F('comment_count') - 1,
+      last_commented_at=last,
+    )
+
+  @classmethod
+  def rebuild(cls, content_type=None, object_ids=None):
+    """
+    Recompute counters from the comments table with one aggregate query.
+    Limit to one content type (and object ids) or rebuild all counters.
+
+    Returns:
+      int: Number of counters written.
+    """
+    comments = cls.get_comment_model()._base_manager.filter(cls.counted_filter())
+    counters = cls.objects.all()
+    if content_type is not None:
+      comments = comments.filter(content_type=content_type)
+      counters = counters.filter(content_type=content_type)
+      if object_ids is not None:
+        comments = comments.filter(object_id__in=object_ids)
+        counters = counters.filter(object_id__in=object_ids)
+    rows = comments.values('content_type_id', 'object_id').annotate(count=Count('pk'), last=Max('date_created')).order_by()
+    with transaction.atomic():
+      counters.delete()
+      cls.objects.bulk_create([
+        cls(content_type_id=row['content_type_id'], object_id=row['object_id'], comment_count=row['count'], last_commented_at=row['last'])
+        for row in rows
+      ], batch_size=500)
+    return len(rows)
+
+  ''' Queryset helper '''
+  @classmethod
+  def annotate(cls, queryset):
+    """
+    Annotate a queryset of any model with comment_count and last_commented_at.
+
+    The counter row is looked up per object on the (content_type, object_id)
+    unique index; objects without a counter get 0 and None.
+    """
+    counter = cls.objects.filter(
+      content_type=ContentType.objects.get_for_model(queryset.model),
+      object_id=OuterRef('pk'),
+    )
+    return queryset.annotate(
+      comment_count=Coalesce(Subquery(counter.values('comment_count')[:1]), 0),
+      last_commented_at=Subquery(counter.values('last_commented_at')[:1]),
+    )
+
+  ''' Signal handlers '''
+  @classmethod
+  def comment_saved(cls, sender, instance, created, **kwargs):
+    if kwargs.get('raw'):
+      return
+    new = {'status': instance.status, 'visibility': instance.visibility}
+    target = (instance.content_type_id, instance.object_id)
+    loaded = getattr(instance, '_loaded_values', None)
+    if created:
+      old, old_target = {}, target
+    elif loaded is None:
+      # Previous state unknown, recount this target
+      cls.rebuild(ContentType.objects.get_for_id(instance.content_type_id), [instance.object_id])
+      return
+    else:
+      old = loaded
+      old_target = (loaded.get('content_type_id', target[0]), loaded.get('object_id', target[1]))
+    was_counted, is_counted = cls.is_counted(old), cls.is_counted(new)
+    if was_counted and (not is_counted or old_target != target):
+      cls.decrement(*old_target)
+    if is_counted and (not was_counted or old_target != target):
+      cls.increment(*target, instance.date_created)
+
+  @classmethod
+  def comment_deleted(cls, sender, instance, **kwargs):
+    if cls.is_counted({'status': instance.status, 'visibility': instance.visibility}):
+      cls.decrement(instance.content_type_id, instance.object_id)
+
+
+def connect_comment_counters():
+  """ Connect the signal handlers of all concrete BaseCommentCounter models. Called from AppConfig.ready(). """
+  for model in apps.get_models():
+    if not issubclass(model, BaseCommentCounter):
+      continue
+    comment_model = model.get_comment_model()
+    uid = f'cmnsd_comment_counter_{model._meta.label_lower}'
+    post_save.connect(model.comment_saved, sender=comment_model, dispatch_uid=uid)
+    post_delete.connect(model.comment_deleted, sender=comment_model, dispatch_uid=uid)
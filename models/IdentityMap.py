@@ -0,0 +1,124 @@
+from django.db.models.query import ModelIterable, QuerySet
+
+''' Identity map
+    Keeps one instance per (model, pk) for the duration of a request, so
+    rows loaded by one field are reused by the next: the object's owner is
+    the request user, tag parents that are listed themselves are not loaded
+    again, and querysets are evaluated once. Foreign keys of registered
+    objects are filled from the map when their target was already loaded.
+    The map is stored on the request.
+'''
+REQUEST_ATTRIBUTE = '_cmnsd_identity_map'
+
+def get_identity_map(request):
+  """
+  Return the identity map of a request, created on first use with the
+  authenticated request user registered. Without a request, a new map is
+  returned that is not shared.
+  """
+  identity_map = getattr(request, REQUEST_ATTRIBUTE, None) if request is not None else None
+  if identity_map is None:
+    identity_map = IdentityMap()
+    if request is not None:
+      user = getattr(request, 'user', None)
+      if user is not None and user.is_authenticated:
+        identity_map.add(getattr(user, '_wrapped', user))
+      setattr(request, REQUEST_ATTRIBUTE, identity_map)
+  return identity_map
+
+
+class IdentityMap:
+  """ Request-scoped registry of model instances keyed by (model, pk). """
+
+  def __init__(self):
+    self._objects = {}
+    self.hits = 0
+
+  def __len__(self):
+    return len(self._objects)
+
+  def __contains__(self, obj):
+    return self._key(type(obj), obj.pk) in self._objects
+
+  def _key(self, model, pk):
+    return (model._meta.concrete_model, pk)
+
+  def get(self, model, pk):
+    """ Return the registered instance of model with pk, or None. """
+    if pk is None:
+      return None
+    return self._objects.get(self._key(model, pk))
+
+  def add(self, obj):
+    """
+    Register obj and return the instance to use for its row: the instance
+    registered earlier, or obj itself.
+    """
+    if obj is None or not hasattr(obj, '_meta') or obj.pk is None:
+      return obj
+    key = self._key(type(obj), obj.pk)
+    existing = self._objects.get(key)
+    if existing is not None:
+      if existing is not obj:
+        self.hits += 1
+      return existing
+    self._objects[key] = obj
+    return obj
+
+  def attach(self, obj):
+    """ Fill the unloaded foreign keys of obj whose target is registered. Returns obj. """
+    if obj is None or not hasattr(obj, '_meta'):
+      return obj
+    for field in obj._meta.concrete_fields:
+      if not (field.many_to_one or field.one_to_one) or field.is_cached(obj):
+        continue
+      target = self.get(field.related_model, getattr(obj, field.attname))
+      if target is not None:
+        field.set_cached_value(obj, target)
+        self.hits += 1
+    return obj
+
+  def evaluate(self, queryset):
+    """
+    Evaluate a queryset once, with its rows replaced by registered
+    instances where the row was loaded before. Related objects loaded by
+    select_related() and prefetch_related() are kept on the instance used.
+    Querysets with deferred fields, annotations or values() are evaluated
+    without replacing rows.
+
+    Returns:
+      QuerySet: The same queryset, with its result cache filled.
+    """
+    if not isinstance(queryset, QuerySet):
+      return queryset
+    if queryset._result_cache is not None:
+      return queryset
+    rows = list(queryset)
+    plain = (
+      queryset._iterable_class is ModelIterable
+      and not queryset.query.annotations
+      and queryset.query.deferred_loading == (frozenset(), True)
+    )
+    if plain:
+      rows = [self._merge(self.add(row), row) for row in rows]
+      for row in rows:
+        self.attach(row)
+      queryset._result_cache = rows
+    return queryset
+
+  def _merge(self, existing, row):
+    """
+    Copy the select_related and prefetch_related caches the queryset filled
+    on row to the registered instance used in its place, so replacing the
+    row does not bring back the queries they saved. Returns existing.
+    """
+    if existing is row:
+      return existing
+    for name, value in row._state.fields_cache.items():
+      existing._state.fields_cache.setdefault(name, value)
+    prefetched = row.__dict__.get('_prefetched_objects_cache')
+    if prefetched:
+      cache = existing.__dict__.setdefault('_prefetched_objects_cache', {})
+      for name, value in prefetched.items():
+        cache.setdefault(name, value)
+    return existing
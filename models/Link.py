@@ -1,11 +1,143 @@
 from django.db import models
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.signals import setting_changed
 from django.core.validators import URLValidator
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
-from urllib.parse import urlparse, parse_qs
+from fnmatch import fnmatch
+from functools import lru_cache
+from urllib.parse import urlparse, parse_qs, parse_qsl, urlencode, urlsplit, urlunsplit
 
 from cmnsd.models import BaseModel
 
+''' Link display rules
+    A rule receives the parsed URL and returns a display label, or None to
+    fall back to the domain. Rules are registered per normalized domain
+    (lowercase, without 'www.'). Add or override rules with the
+    LINK_DISPLAY_RULES setting, mapping a domain to a callable or a dotted
+    path; map a domain to None to disable a default rule:
+
+      LINK_DISPLAY_RULES = {'tripadvisor.com': 'myapp.links.tripadvisor'}
+'''
+def google_display_name(parsed):
+  params = parse_qs(parsed.query)
+  if 'q' in params:
+    return f'{params["q"][0]} on Google'
+
+def blootkompas_display_name(parsed):
+  path_parts = parsed.path.strip('/').split('/')
+  if len(path_parts) >= 2 and path_parts[0] == 'locaties':
+    location_name = path_parts[1].replace('-', ' ').title()
+    return f'{location_name} on Blootkompas'
+
+def zoover_display_name(parsed):
+  path_parts = parsed.path.strip('/').split('/')
+  if path_parts[-1] in ['camping', 'hotel']:
+    location_name = path_parts[-2].replace('-', ' ').title()
+  else:
+    location_name = path_parts[-1].replace('-', ' ').title()
+  return f'{location_name} on Zoover'
+
+DEFAULT_LINK_DISPLAY_RULES = {
+  'google.com': google_display_name,
+  'google.nl': google_display_name,
+  'google.co.uk': google_display_name,
+  'blootkompas.nl': blootkompas_display_name,
+  'zoover.com': zoover_display_name,
+  'zoover.nl': zoover_display_name,
+}
+
+@lru_cache(maxsize=None)
+def get_link_display_rules():
+  """Return the compiled {domain: rule} registry, built once from the defaults and settings."""
+  rules = dict(DEFAULT_LINK_DISPLAY_RULES)
+  for domain, rule in getattr(settings, 'LINK_DISPLAY_RULES', {}).items():
+    domain = normalize_domain(domain)
+    if rule is None:
+      rules.pop(domain, None)
+    else:
+      rules[domain] = import_string(rule) if isinstance(rule, str) else rule
+  return rules
+
+@receiver(setting_changed)
+def _reset_link_display_rules(setting, **kwargs):
+  if setting == 'LINK_DISPLAY_RULES':
+    get_link_display_rules.cache_clear()
+
+def normalize_domain(domain):
+  """Return the domain in lowercase without 'www.' prefix."""
+  domain = domain.lower()
+  return domain[4:] if domain.startswith('www.') else domain
+
+# Lengths of the computed BaseLink.domain and BaseLink.display_label columns
+LINK_DOMAIN_MAX_LENGTH = 255
+LINK_DISPLAY_LABEL_MAX_LENGTH = 500
+
+def get_link_display_metadata(url):
+  """
+  Return the normalized domain and the display label for a URL.
+
+  Returns:
+    tuple: (domain, display_label). The label is the result of the domain's
+           display rule, or the domain itself. On parse errors the URL is
+           used as label. Both are cut to the length of their column.
+  """
+  try:
+    parsed = urlparse(url)
+    domain = normalize_domain(parsed.netloc or parsed.path)
+  except Exception:
+    return '', url[:LINK_DISPLAY_LABEL_MAX_LENGTH]
+  domain = domain[:LINK_DOMAIN_MAX_LENGTH]
+  label = domain
+  rule = get_link_display_rules().get(domain)
+  if rule:
+    try:
+      label = rule(parsed) or domain
+    except Exception:
+      label = url
+  return domain, label[:LINK_DISPLAY_LABEL_MAX_LENGTH]
+
+''' Canonical URL
+    Variations of the same URL (http/https, www., trailing slash, tracking
+    parameters, parameter order, fragment) share one canonical URL, used to
+    find an existing link instead of creating a duplicate. Query parameters
+    matching LINK_TRACKING_PARAMETERS (fnmatch patterns) are removed.
+'''
+DEFAULT_LINK_TRACKING_PARAMETERS = [
+  'utm_*', 'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', 'ref_src',
+]
+
+def canonicalize_url(url):
+  """
+  Return the canonical form of a URL: https, lowercase domain without
+  'www.' and default port, no trailing slash, no fragment and the
+  remaining query parameters sorted.
+  """
+  url = (url or '').strip()
+  if not url:
+    return ''
+  if '://' not in url:
+    url = f'https://{url}'
+  try:
+    parsed = urlsplit(url)
+    port = parsed.port
+  except ValueError:
+    return url
+  scheme = parsed.scheme.lower()
+  if scheme == 'http':
+    scheme = 'https'
+  netloc = normalize_domain(parsed.hostname or '')
+  if port and port not in (80, 443):
+    netloc += f':{port}'
+  patterns = getattr(settings, 'LINK_TRACKING_PARAMETERS', DEFAULT_LINK_TRACKING_PARAMETERS)
+  params = [
+    (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+    if not any(fnmatch(key.lower(), pattern) for pattern in patterns)
+  ]
+  return urlunsplit((scheme, netloc, parsed.path.rstrip('/'), urlencode(sorted(params)), ''))
+
 class BaseLink(BaseModel):
   url = models.URLField(
     max_length=500,
@@ -16,6 +148,26 @@ class BaseLink(BaseModel):
     blank=True,
     help_text=_('Optional display label for the link')
   )
+  # Computed on save from url, see update_display_metadata()
+  domain = models.CharField(
+    max_length=LINK_DOMAIN_MAX_LENGTH,
+    blank=True,
+    editable=False,
+    help_text=_('Normalized domain of the URL')
+  )
+  display_label = models.CharField(
+    max_length=LINK_DISPLAY_LABEL_MAX_LENGTH,
+    blank=True,
+    editable=False,
+    help_text=_('Display label computed from the URL')
+  )
+  canonical_url = models.CharField(
+    max_length=500,
+    blank=True,
+    editable=False,
+    db_index=True,
+    help_text=_('Canonical form of the URL, used to detect duplicates')
+  )
   
   class Meta:
     ordering = ['id']
@@ -38,40 +190,31 @@ class BaseLink(BaseModel):
         })
   
   def display_name(self):
-    """Return the domain name from the URL."""
+    """Return the label, or the display label computed from the URL."""
     if self.label:
       return self.label
-    try:
-      parsed = urlparse(self.url)
-      domain = parsed.netloc or parsed.path
-      # Remove www. prefix if present
-      if domain.startswith('www.'):
-        domain = domain[4:]
-      # Special Cases
-      if domain.lower() in ['google.com', 'google.nl', 'google.co.uk']:
-        params = parse_qs(parsed.query)
-        if 'q' in params:
-          return f'{params["q"][0]} on Google'
-      elif domain.lower() == 'blootkompas.nl':
-        path_parts = parsed.path.strip('/').split('/')
-        if len(path_parts) >= 2 and path_parts[0] == 'locaties':
-          location_name = path_parts[1].replace('-', ' ').title()
-          return f'{location_name} on Blootkompas'
-      elif domain.lower() in ['zoover.com', 'zoover.nl']:
-        path_parts = parsed.path.strip('/').split('/')
-        if path_parts[-1] in ['camping', 'hotel']:
-          location_name = path_parts[-2].replace('-', ' ').title()
-        else:
-          location_name = path_parts[-1].replace('-', ' ').title()
-        return f'{location_name} on Zoover'
-      return domain
-    except Exception:
-      return self.url
-  
+    if self.display_label:
+      return self.display_label
+    return get_link_display_metadata(self.url)[1]
+
+  def update_display_metadata(self):
+    """Store the normalized domain, the computed display label and the canonical URL."""
+    self.domain, self.display_label = get_link_display_metadata(self.url)
+    self.canonical_url = canonicalize_url(self.url)
+
+  @staticmethod
+  def canonicalize_url(url):
+    return canonicalize_url(url)
+
   def save(self, *args, **kwargs):
+    before = self._get_loaded_values()
     # Normalize URL protocol before validation
     if self.url and not self.url.startswith(('http://', 'https://')):
       self.url = f'https://{self.url}'
-    
-    self.full_clean()
-    super().save(*args, **kwargs)
\ No newline at end of file
+    # Validate field values without the uniqueness and foreign key queries
+    # of full_clean(); the database enforces those constraints.
+    self.clean_fields(exclude=[f.name for f in self._meta.fields if f.is_relation])
+    self.clean()
+    self.update_display_metadata()
+    self._add_update_fields(kwargs, before)
+    super().save(*args, **kwargs)
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import models
+from django.dispatch import receiver
+
+import hashlib
+import threading
+
+import markdown as md
+
+''' Markdown rendering
+    One Markdown instance per thread is reused between conversions, so the
+    extensions are loaded once. Rendered HTML of values without stored HTML
+    is kept in a process-level LRU keyed by a hash of the source text.
+'''
+DEFAULT_MARKDOWN_EXTENSIONS = ['markdown.extensions.fenced_code', 'nl2br', 'tables']
+
+_local = threading.local()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def get_markdown_extensions():
+  return list(getattr(settings, 'MARKDOWN_EXTENSIONS', DEFAULT_MARKDOWN_EXTENSIONS))
+
+def render_markdown(text):
+  """Convert markdown text to HTML with the configured extensions."""
+  extensions = get_markdown_extensions()
+  converter = getattr(_local, 'converter', None)
+  if converter is None or getattr(_local, 'extensions', None) != extensions:
+    converter = _local.converter = md.Markdown(extensions=extensions)
+    _local.extensions = extensions
+  return converter.reset().convert(text or '')
+
+def render_markdown_cached(text):
+  """Return render_markdown(text), cached per process by a hash of text."""
+  text = text or ''
+  key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+  with _cache_lock:
+    html = _cache.get(key)
+    if html is not None:
+      _cache.move_to_end(key)
+      return html
+  html = render_markdown(text)
+  with _cache_lock:
+    _cache[key] = html
+    while len(_cache) > getattr(settings, 'MARKDOWN_CACHE_SIZE', 256):
+      _cache.popitem(last=False)
+  return html
+
+@receiver(setting_changed)
+def _reset_markdown_cache(setting, **kwargs):
+  if setting in ['MARKDOWN_EXTENSIONS', 'MARKDOWN_CACHE_SIZE']:
+    with _cache_lock:
+      _cache.clear()
+
+
+class MarkdownCacheMixin(models.Model):
+  """Mixin that stores the rendered HTML of markdown fields.
+
+  ``markdown_fields`` maps a markdown source field to the field holding its
+  rendered HTML. The HTML is regenerated on save when the source changed.
+  The HTML fields are declared by the concrete model:
+
+    class Page(PageModel, MarkdownCacheMixin):
+      markdown_fields = {'body': 'body_html'}
+      body_html = models.TextField(blank=True, editable=False)
+
+  Run the management command `rerender_markdown` after changing
+  MARKDOWN_EXTENSIONS to regenerate the stored HTML of all rows.
+  """
+  markdown_fields = {}
+
+  class Meta:
+    abstract = True
+
+  def update_markdown_html(self, force=False):
+    """Render changed markdown fields. Returns the names of the updated HTML fields."""
+    loaded = getattr(self, '_loaded_values', None)
+    updated = []
+    for source, target in self.markdown_fields.items():
+      value = getattr(self, source)
+      changed = force or self._state.adding or loaded is None or loaded.get(source) != value
+      if changed or (value and not getattr(self, target)):
+        setattr(self, target, render_markdown(value))
+        updated.append(target)
+    return updated
+
+  def save(self, *args, **kwargs):
+    updated = self.update_markdown_html()
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and updated:
+      kwargs['update_fields'] = list(dict.fromkeys(list(update_fields) + updated))
+    super().save(*args, **kwargs)
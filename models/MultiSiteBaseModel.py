@@ -2,7 +2,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 
-from .BaseModel import BaseModel
+from .BaseModel import BaseModel, BaseManager
 
 if 'django.contrib.sites' in settings.INSTALLED_APPS:
   from django.contrib.sites.models import Site
@@ -16,7 +16,7 @@ if 'django.contrib.sites' in settings.INSTALLED_APPS:
   class MultiSiteBaseModel(BaseModel):
     """Abstract base model with common fields and methods."""
     sites = models.ManyToManyField(Site, related_name="%(class)s_sites")
-    objects = models.Manager()  # Default manager
+    objects = BaseManager()  # Default manager
     on_site = CurrentSiteManager()  # Site-specific manager
 
     class Meta:
@@ -0,0 +1,253 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+import copy
+import sys
+import threading
+import uuid
+
+''' Object cache
+    Process-level LRU of recently loaded model instances, keyed by
+    (model, pk), used by the ajax views to resolve objects addressed by id,
+    slug or token without a query. Every entry stores the version token of
+    its object as it was when the object was loaded. The token lives in the
+    shared cache (OBJECT_CACHE_ALIAS) and is replaced when the object is
+    saved or deleted, so all processes notice the change on their next
+    lookup. Instances are copied in and out of the cache; callers may change
+    the returned object. Objects are admitted on their second miss, so
+    objects requested once cost no shared cache round trip. Callers check
+    access themselves; the ajax views apply the rules of FilterMixin.filter()
+    to a cached object in memory (FilterMixin.is_readable()).
+
+    Models are cached when they inherit from BaseModel, unless they set
+    ajax_object_cache = False. Set OBJECT_CACHE_SIZE to 0 to disable.
+    queryset.update() does not send signals; call invalidate_cached_objects()
+    after it.
+
+    Version tokens are kept for all BaseModel subclasses, also when the
+    object cache is disabled: one per object, replaced on save and delete,
+    and one per model, replaced when one of its objects is. Memoized
+    @ajax_function results are keyed by them; for the models involved,
+    many-to-many changes replace the tokens as well. Other many-to-many
+    relations are not watched, as listening to m2m_changed costs every
+    add() an extra query.
+'''
+_objects = OrderedDict()
+_seen = OrderedDict()
+_aliases = {}
+_stats = {'hits': 0, 'misses': 0}
+_lock = threading.Lock()
+
+ALIAS_FIELDS = ['slug', 'token']
+
+def get_object_cache_size():
+  return getattr(settings, 'OBJECT_CACHE_SIZE', 256)
+
+def _get_cache():
+  return caches[getattr(settings, 'OBJECT_CACHE_ALIAS', 'default')]
+
+def _get_version_key(model, pk):
+  return f'cmnsd:object:{model._meta.label_lower}:{pk}'
+
+def _get_model_version_key(model):
+  return f'cmnsd:model:{model._meta.label_lower}'
+
+def _get_version(model, pk=None):
+  """ Return the version token of an object, or of the model without pk, creating one if the shared cache has none. """
+  cache = _get_cache()
+  key = _get_version_key(model, pk) if pk is not None else _get_model_version_key(model)
+  version = cache.get(key)
+  if version is None:
+    cache.add(key, uuid.uuid4().hex, None)
+    version = cache.get(key)
+  return version
+
+def is_versioned(model):
+  """ Return True if version tokens are kept for the model. """
+  from cmnsd.models.BaseModel import BaseModel
+  return isinstance(model, type) and issubclass(model, BaseModel)
+
+def is_cacheable(model):
+  """ Return True if instances of the model are kept in the object cache. """
+  return get_object_cache_size() > 0 and is_versioned(model) and getattr(model, 'ajax_object_cache', True)
+
+def get_version(model, pk=None):
+  """ Return the version token of an object, or of the model when pk is None; None for models without tokens. """
+  if not is_versioned(model):
+    return None
+  if pk is None:
+    return _get_version(model)
+  pk = _normalize_pk(model, pk)
+  return _get_version(model, pk) if pk is not None else None
+
+def _copy(obj):
+  obj = copy.copy(obj)
+  obj._state.fields_cache = {}
+  obj.__dict__.pop('_prefetched_objects_cache', None)
+  obj.__dict__.pop('request', None)
+  return obj
+
+def _normalize_pk(model, value):
+  try:
+    return model._meta.pk.to_python(value)
+  except (ValidationError, TypeError, ValueError):
+    return None
+
+def _resolve_pk(model, label, identifiers):
+  """ Return the primary key addressed by identifiers, resolving slug or token through the known aliases. Call with _lock held. """
+  pk = identifiers.get('id', identifiers.get('pk'))
+  if pk is not None:
+    return _normalize_pk(model, pk)
+  for field in ALIAS_FIELDS:
+    if field in identifiers:
+      return _aliases.get((label, field, str(identifiers[field])))
+  return None
+
+def get_cached_object(model, identifiers):
+  """
+  Look up an object in the cache.
+
+  Objects are admitted on their second miss: the first miss of an object
+  only records its key, without a shared cache round trip, so lookups of
+  objects that are not requested again cost nothing extra.
+
+  Args:
+    model: The model class.
+    identifiers (dict): Exact values of 'id', 'slug' and/or 'token'. At
+      least one of them is required; other keys make the lookup miss.
+
+  Returns:
+    tuple: (obj, version). obj is a copy of the object if it is cached and
+    unchanged, otherwise None. On a miss, version is the token to pass to
+    cache_object() once the object is loaded, or None when the object is
+    not cached yet.
+  """
+  if not is_cacheable(model) or not identifiers or any(key not in ['id', 'pk'] + ALIAS_FIELDS for key in identifiers):
+    return None, None
+  label = model._meta.label_lower
+  with _lock:
+    pk = _resolve_pk(model, label, identifiers)
+    entry = _objects.get((label, pk)) if pk is not None else None
+    if entry is None:
+      _stats['misses'] += 1
+      if pk is None or (label, pk) not in _seen:
+        return None, None
+  version = _get_version(model, pk)
+  if entry is None:
+    return None, (pk, version)
+  cached_version, obj = entry
+  matches = all(str(getattr(obj, field, None)) == str(identifiers[field]) for field in ALIAS_FIELDS if field in identifiers)
+  if not matches or version != cached_version:
+    with _lock:
+      _stats['misses'] += 1
+    return None, (pk, version) if matches else None
+  with _lock:
+    _stats['hits'] += 1
+    if (label, pk) in _objects:
+      _objects.move_to_end((label, pk))
+  return _copy(obj), None
+
+def _get_alias_values(obj):
+  return [(field, str(getattr(obj, field))) for field in ALIAS_FIELDS if getattr(obj, field, None)]
+
+def _forget_aliases(label, pk, values):
+  for field, value in values:
+    if _aliases.get((label, field, value)) == pk:
+      del _aliases[(label, field, value)]
+
+def cache_object(obj, version=None):
+  """
+  Store a copy of a loaded object. Pass the version returned by
+  get_cached_object() before the object was loaded, so a change saved in
+  between is not hidden. Without a version, or with the version of another
+  object, the object is only recorded as seen and cached on its next miss.
+  """
+  model = obj.__class__
+  if not is_cacheable(model) or obj.pk is None:
+    return
+  version = version[1] if version is not None and version[0] == obj.pk else None
+  label = model._meta.label_lower
+  values = _get_alias_values(obj)
+  with _lock:
+    for field, value in values:
+      _aliases[(label, field, value)] = obj.pk
+    if version is None:
+      if (label, obj.pk) not in _objects:
+        _seen[(label, obj.pk)] = values
+        _seen.move_to_end((label, obj.pk))
+        while len(_seen) > get_object_cache_size():
+          (old_label, old_pk), old_values = _seen.popitem(last=False)
+          _forget_aliases(old_label, old_pk, old_values)
+      return
+    _seen.pop((label, obj.pk), None)
+    _objects[(label, obj.pk)] = (version, _copy(obj))
+    _objects.move_to_end((label, obj.pk))
+    while len(_objects) > get_object_cache_size():
+      (old_label, old_pk), (_version, old_obj) = _objects.popitem(last=False)
+      _forget_aliases(old_label, old_pk, _get_alias_values(old_obj))
+
+def invalidate_cached_objects(model, pks):
+  """ Replace the version tokens of the given objects and their model once the transaction commits. """
+  if not is_versioned(model):
+    return
+  keys = [_get_version_key(model, pk) for pk in pks]
+  if keys:
+    keys.append(_get_model_version_key(model))
+    transaction.on_commit(lambda: _get_cache().set_many({key: uuid.uuid4().hex for key in keys}, None))
+
+def get_object_cache_info():
+  """ Return the size, approximate memory use in bytes, hits, misses and hit rate of the object cache. """
+  with _lock:
+    entries = [obj for _version, obj in _objects.values()]
+    hits, misses = _stats['hits'], _stats['misses']
+  size = sum(sys.getsizeof(obj.__dict__) + sum(sys.getsizeof(value) for value in obj.__dict__.values()) for obj in entries)
+  lookups = hits + misses
+  return {
+    'size': len(entries),
+    'max_size': get_object_cache_size(),
+    'bytes': size,
+    'hits': hits,
+    'misses': misses,
+    'hit_rate': round(hits / lookups, 3) if lookups else None,
+  }
+
+def clear_object_cache():
+  with _lock:
+    _objects.clear()
+    _seen.clear()
+    _aliases.clear()
+    _stats.update(hits=0, misses=0)
+
+''' Invalidation '''
+def _object_changed(sender, instance, **kwargs):
+  if instance.pk is not None:
+    invalidate_cached_objects(sender, [instance.pk])
+
+def _relation_changed(sender, instance, action, model, pk_set, **kwargs):
+  if action not in ['post_add', 'post_remove', 'post_clear']:
+    return
+  if instance.pk is not None:
+    invalidate_cached_objects(type(instance), [instance.pk])
+  if pk_set:
+    invalidate_cached_objects(model, pk_set)
+
+def connect_object_cache():
+  """ Replace version tokens on save, delete and many-to-many changes. Called from AppConfig.ready(). """
+  post_save.connect(_object_changed, dispatch_uid='cmnsd_object_cache_save')
+  post_delete.connect(_object_changed, dispatch_uid='cmnsd_object_cache_delete')
+  from cmnsd.models.BaseMethods import get_cached_function_models
+  for model in get_cached_function_models():
+    for field in model._meta.many_to_many:
+      through = field.remote_field.through
+      m2m_changed.connect(_relation_changed, sender=through, dispatch_uid=f'cmnsd_object_cache_{through._meta.label_lower}')
+
+@receiver(setting_changed)
+def _reset_object_cache(setting, **kwargs):
+  if setting in ['OBJECT_CACHE_SIZE', 'OBJECT_CACHE_ALIAS']:
+    clear_object_cache()
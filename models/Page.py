@@ -1,9 +1,12 @@
 from django.conf import settings
-from django.db import models
+from django.core.cache import caches
+from django.db import models, transaction
+from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 
 from cmnsd.models.BaseModel import BaseModel
 from cmnsd.models.VisibilityModel import VisibilityModel
+from cmnsd.models.MarkdownCache import render_markdown_cached
 
 
 class PageModel(BaseModel, VisibilityModel):
@@ -15,6 +18,11 @@ class PageModel(BaseModel, VisibilityModel):
 
   Each (slug, language) pair is unique — one row per page per language.
   The view falls back to LANGUAGE_CODE if no translation exists.
+
+  Use Page.resolve(slug, request) in the detail view. For anonymous users
+  the resolved page and its rendered body are cached per (slug, language),
+  so a warm page view does not query the database. Saving or deleting a
+  page clears the cached entries of its slug in all languages.
   """
 
   slug = models.SlugField(help_text=_('URL identifier, e.g. "privacy" or "about"'))
@@ -34,3 +42,100 @@ class PageModel(BaseModel, VisibilityModel):
 
   def __str__(self):
     return f'{self.title} ({self.language})'
+
+  def save(self, *args, **kwargs):
+    slugs = {self.slug, getattr(self, '_loaded_values', {}).get('slug', self.slug)}
+    super().save(*args, **kwargs)
+    self.invalidate_page_cache(slugs)
+
+  def delete(self, *args, **kwargs):
+    slug = self.slug
+    result = super().delete(*args, **kwargs)
+    self.invalidate_page_cache([slug])
+    return result
+
+  ''' Page Resolution '''
+  @classmethod
+  def get_page_cache(cls):
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+  @classmethod
+  def get_page_cache_key(cls, slug, language):
+    return f'cmnsd:page:{cls._meta.label_lower}:{slug}:{language}'
+
+  @classmethod
+  def get_page_languages(cls, language=None):
+    """
+    Return the languages to try in order: the requested (or active)
+    language mapped to one of LANGUAGES, then LANGUAGE_CODE.
+    """
+    language = language or translation.get_language() or settings.LANGUAGE_CODE
+    try:
+      language = translation.get_supported_language_variant(language)
+    except LookupError:
+      language = settings.LANGUAGE_CODE
+    return list(dict.fromkeys([language, settings.LANGUAGE_CODE]))
+
+  @classmethod
+  def resolve(cls, slug, request=None, language=None):
+    """
+    Return the page for a slug in the active language, falling back to
+    LANGUAGE_CODE. The page has `body_html` set to its rendered body.
+
+    Anonymous users only get published, public pages; this resolution is
+    cached, including misses. Authenticated users are resolved from the
+    database with filter_status() and filter_visibility().
+
+    Args:
+      slug (str): Page slug.
+      request: Current request, or None for anonymous access.
+      language (str): Language code. Default: the active language.
+
+    Returns:
+      PageModel: The resolved page.
+
+    Raises:
+      DoesNotExist: If no page is visible in either language.
+    """
+    languages = cls.get_page_languages(language)
+    if request is not None and request.user.is_authenticated:
+      page = cls._find_page(slug, languages, request)
+    else:
+      cache = cls.get_page_cache()
+      key = cls.get_page_cache_key(slug, languages[0])
+      page = cache.get(key)
+      if page is None:
+        page = cls._find_page(slug, languages) or False
+        cache.set(key, page, getattr(settings, 'PAGE_CACHE_TIMEOUT', 86400))
+    if not page:
+      raise cls.DoesNotExist(_("page '{}' not found").format(slug).capitalize())
+    return page
+
+  @classmethod
+  def _find_page(cls, slug, languages, request=None):
+    """ Return the visible page in the first available language with one query, or None. """
+    queryset = cls.objects.filter(slug=slug, language__in=languages)
+    queryset = cls.filter_visibility(cls.filter_status(queryset, request), request)
+    pages = {page.language: page for page in queryset}
+    for language in languages:
+      if language in pages:
+        page = pages[language]
+        if not getattr(page, 'body_html', None):
+          page.body_html = render_markdown_cached(page.body)
+        return page
+    return None
+
+  @classmethod
+  def invalidate_page_cache(cls, slugs=None):
+    """
+    Remove cached resolutions of these slugs in all languages, after the
+    current transaction commits. Without slugs, all pages are cleared.
+    Call this after changes that bypass save(), such as queryset.update().
+    """
+    if slugs is None:
+      slugs = cls._base_manager.values_list('slug', flat=True).order_by().distinct()
+    keys = [
+      cls.get_page_cache_key(slug, code)
+      for slug in set(slugs) for code, name in settings.LANGUAGES
+    ]
+    transaction.on_commit(lambda: cls.get_page_cache().delete_many(keys))
@@ -20,10 +20,12 @@ class Tag(BaseModel):
     return self.display_name()
     
   def save(self, *args, **kwargs):
+    before = self._get_loaded_values()
     if not self.name and self.slug:
       self.name = self.slug.replace('-', ' ').replace('_', ' ').replace('+', ' ').title()
     if not self.slug and self.name:
       self.slug = slugify(self.name)
+    self._add_update_fields(kwargs, before)
     super().save(*args, **kwargs)
 
   def display_name(self) -> str:
@@ -22,11 +22,20 @@ class TagModel(BaseModel):
   def __str__(self) -> str:
     return self.display_name()
     
+  @classmethod
+  def index_presets(cls, prefix='%(app_label)s_%(class)s', partial=True):
+    """ Add an index for lookups and sorting by name. See BaseModel.index_presets(). """
+    return super().index_presets(prefix=prefix, partial=partial) + [
+      models.Index(fields=['name'], name=f'{prefix}_name'),
+    ]
+
   def save(self, *args, **kwargs):
+    before = self._get_loaded_values()
     if not self.name and self.slug:
       self.name = self.slug.replace('-', ' ').replace('_', ' ').replace('+', ' ').title()
     if not self.slug and self.name:
       self.slug = slugify(self.name)
+    self._add_update_fields(kwargs, before)
     super().save(*args, **kwargs)
 
   def display_name(self) -> str:
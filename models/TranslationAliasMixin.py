@@ -6,9 +6,9 @@ from django.utils.translation import gettext_lazy as _
 class TranslationAliasMixin(models.Model):
   """Mixin that adds an `aliases` field and auto-populates it with translations.
 
-  On each save, iterates over settings.LANGUAGES, activates each language,
-  translates `self.name` via gettext, and stores any results that differ from
-  the stored name as a comma-separated string in `aliases`.
+  On each save, iterates over settings.LANGUAGES, translates `self.name` with
+  each language's catalog, and stores any results that differ from the stored
+  name as a comma-separated string in `aliases`.
 
   This makes the name searchable in all configured languages without any changes
   to the search layer — FilterMixin auto-discovers the `aliases` TextField.
@@ -18,7 +18,8 @@ class TranslationAliasMixin(models.Model):
         name = models.CharField(...)
 
   After adding the mixin, run makemigrations. Run the management command
-  `update_translation_aliases` after compilemessages to refresh stale aliases.
+  `update_translation_aliases` after compilemessages to refresh stale aliases
+  of all rows in bulk.
   """
 
   aliases = models.TextField(
@@ -30,17 +31,34 @@ class TranslationAliasMixin(models.Model):
   class Meta:
     abstract = True
 
-  def _update_aliases(self):
-    """Populate aliases with all available translations of self.name."""
-    from django.utils.translation import get_language, activate, gettext
-    from django.conf import settings
-    current = get_language()
+  def save(self, *args, **kwargs):
+    self._update_aliases()
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'name' in update_fields and 'aliases' not in update_fields:
+      kwargs['update_fields'] = list(update_fields) + ['aliases']
+    super().save(*args, **kwargs)
+
+  @staticmethod
+  def build_aliases(name, translations):
+    """Return the aliases string for name from its translations, in order, without duplicates."""
     parts = []
-    for lang_code, _ in settings.LANGUAGES:
-      activate(lang_code)
-      translated = gettext(self.name)
-      if translated != self.name and translated not in parts:
+    for translated in translations:
+      if translated != name and translated not in parts:
         parts.append(translated)
-    if current:
-      activate(current)
-    self.aliases = ', '.join(parts)
+    return ', '.join(parts)
+
+  def _update_aliases(self):
+    """Populate aliases with all available translations of self.name.
+
+    Uses the cached catalog of each language directly instead of activating
+    every language in turn.
+    """
+    from django.utils.translation import trans_real
+    from django.conf import settings
+    if not self.name:
+      self.aliases = ''
+      return
+    self.aliases = self.build_aliases(self.name, (
+      trans_real.translation(lang_code).gettext(self.name)
+      for lang_code, _ in settings.LANGUAGES
+    ))
@@ -0,0 +1,149 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.signals import post_save, m2m_changed
+
+''' User exclusions
+    Users can hide disliked objects (profile.hide_least_liked with
+    profile.dislike) and objects with ignored tags (profile.ignored_tags).
+    The ids are loaded once per request (stored on the user object) and
+    cached across requests until the profile or its relations change.
+'''
+PROFILE_ACCESSOR = 'profile'
+
+def get_profile_model():
+  """ Return the profile model related to the user model as `profile`, or None. """
+  try:
+    field = get_user_model()._meta.get_field(PROFILE_ACCESSOR)
+  except FieldDoesNotExist:
+    return None
+  return field.related_model
+
+def get_profile_relation(name):
+  """ Return the model of a many-to-many field of the profile model, or None. """
+  profile_model = get_profile_model()
+  try:
+    return profile_model._meta.get_field(name).related_model if profile_model else None
+  except FieldDoesNotExist:
+    return None
+
+def _get_cache():
+  return caches[getattr(settings, 'USER_EXCLUSIONS_CACHE_ALIAS', 'default')]
+
+def _get_cache_key(user_id):
+  version = _get_cache().get('cmnsd:user_exclusions:version', 0)
+  return f'cmnsd:user_exclusions:{version}:{user_id}'
+
+def get_user_exclusions(user):
+  """
+  Return the ids of the objects a user excludes from lists.
+
+  Returns:
+    dict: {'dislike': [ids], 'ignored_tags': [ids]}, empty lists for
+    anonymous users and users without a profile.
+  """
+  exclusions = {'dislike': [], 'ignored_tags': []}
+  if user is None or not user.is_authenticated or get_profile_model() is None:
+    return exclusions
+  cached = getattr(user, '_cmnsd_user_exclusions', None)
+  if cached is not None:
+    return cached
+  key = _get_cache_key(user.pk)
+  cached = _get_cache().get(key)
+  if cached is None:
+    profile = get_profile_model()._default_manager.filter(user=user).first()
+    if profile is not None:
+      if getattr(profile, 'hide_least_liked', False) and hasattr(profile, 'dislike'):
+        exclusions['dislike'] = list(profile.dislike.values_list('pk', flat=True))
+      if hasattr(profile, 'ignored_tags'):
+        exclusions['ignored_tags'] = list(profile.ignored_tags.values_list('pk', flat=True))
+    _get_cache().set(key, exclusions, getattr(settings, 'USER_EXCLUSIONS_CACHE_TIMEOUT', 86400))
+    cached = exclusions
+  user._cmnsd_user_exclusions = cached
+  return cached
+
+def invalidate_user_exclusions(user_id=None):
+  """ Clear the cached exclusions of one user, or of all users. """
+  cache = _get_cache()
+  if user_id is None:
+    try:
+      cache.incr('cmnsd:user_exclusions:version')
+    except ValueError:
+      cache.set('cmnsd:user_exclusions:version', 1, None)
+  else:
+    cache.delete(_get_cache_key(user_id))
+
+def _get_relation_path(model, target, many=True):
+  """
+  Return the lookup from model to target: '' for the target itself, a
+  direct relation, or a relation reached through a foreign key (e.g.
+  comment → location → tags). Returns None when there is no such path.
+  """
+  if issubclass(model, target):
+    return ''
+  def direct(current):
+    for field in current._meta.get_fields():
+      if not field.is_relation or field.auto_created or field.related_model is None:
+        continue
+      if (field.many_to_one or (many and field.many_to_many)) and issubclass(field.related_model, target):
+        return field.name
+    return None
+  path = direct(model)
+  if path:
+    return path
+  for field in model._meta.get_fields():
+    if field.many_to_one and not field.auto_created and field.related_model is not None and field.related_model is not model:
+      path = direct(field.related_model)
+      if path:
+        return f'{field.name}__{path}'
+  return None
+
+def exclude_for_user(queryset, user):
+  """
+  Exclude the disliked objects and objects with ignored tags (or child
+  tags of ignored tags) of user from a queryset. The relations are
+  detected from queryset.model; no rows are fetched.
+  """
+  exclusions = get_user_exclusions(user)
+  model = queryset.model
+  dislike_model = get_profile_relation('dislike')
+  if exclusions['dislike'] and dislike_model:
+    path = _get_relation_path(model, dislike_model, many=False)
+    if path is not None:
+      queryset = queryset.exclude(**{f'{path}__in' if path else 'pk__in': exclusions['dislike']})
+  tag_model = get_profile_relation('ignored_tags')
+  if exclusions['ignored_tags'] and tag_model:
+    path = _get_relation_path(model, tag_model)
+    if path is not None:
+      prefix = f'{path}__' if path else ''
+      queryset = queryset.exclude(**{f'{path}__in' if path else 'pk__in': exclusions['ignored_tags']})
+      if any(f.name == 'parent' for f in tag_model._meta.get_fields()):
+        queryset = queryset.exclude(**{f'{prefix}parent__in': exclusions['ignored_tags']})
+  return queryset
+
+''' Signal handlers '''
+def _profile_saved(sender, instance, **kwargs):
+  invalidate_user_exclusions(instance.user_id)
+
+def _profile_relation_changed(sender, instance, action, reverse, **kwargs):
+  if not action.startswith('post_'):
+    return
+  if reverse:
+    # A disliked object or tag changed its profiles; the users are unknown
+    invalidate_user_exclusions()
+  else:
+    invalidate_user_exclusions(instance.user_id)
+
+def connect_user_exclusions():
+  """ Connect the invalidation signal handlers of the profile model. Called from AppConfig.ready(). """
+  profile_model = get_profile_model()
+  if profile_model is None:
+    return
+  post_save.connect(_profile_saved, sender=profile_model, dispatch_uid='cmnsd_user_exclusions')
+  for name in ['dislike', 'ignored_tags']:
+    try:
+      field = profile_model._meta.get_field(name)
+    except FieldDoesNotExist:
+      continue
+    m2m_changed.connect(_profile_relation_changed, sender=field.remote_field.through, dispatch_uid=f'cmnsd_user_exclusions_{name}')
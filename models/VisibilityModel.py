@@ -26,6 +26,21 @@ class VisibilityModel(models.Model):
       'q': 0,
     }
   
+  ''' Index Presets '''
+  @classmethod
+  def index_presets(cls, prefix='%(app_label)s_%(class)s', partial=True):
+    """
+    Return opt-in indexes for visibility filtering. The partial index covers
+    the published-public slice shown to anonymous users and requires the
+    status and date_created fields of BaseModel. See BaseModel.index_presets().
+    """
+    parent = getattr(super(), 'index_presets', None)
+    indexes = parent(prefix=prefix, partial=partial) if parent else []
+    indexes.append(models.Index(fields=['visibility', 'user'], name=f'{prefix}_vis_usr'))
+    if partial:
+      indexes.append(models.Index(fields=['-date_created'], name=f'{prefix}_pub', condition=models.Q(status='p', visibility='p')))
+    return indexes
+
   ''' Visibility Filtering (queryset) '''
   @classmethod
   def _lookup_path_exists(cls, model, path):
@@ -43,9 +58,11 @@ class VisibilityModel(models.Model):
     return True
 
   @classmethod
-  def filter_visibility(cls, queryset, request=None):
-    if request and request.user.is_authenticated:
+  def filter_visibility(cls, queryset, request=None, user=None):
+    """ Filter a queryset on visibility for the user of the request, or the given user. """
+    if user is None and request:
       user = request.user
+    if user is not None and user.is_authenticated:
       q = (
         models.Q(visibility='p') |
         models.Q(visibility='c') |
@@ -64,7 +81,8 @@ class VisibilityModel(models.Model):
     """
     Check whether this object is visible to a given user without an extra
     queryset call. Mirrors filter_visibility() but evaluates in Python on
-    the already-loaded instance. Use this in detail views.
+    the already-loaded instance. Use this in detail views and
+    filter_visible_to() for lists.
 
     Args:
       user: A User instance or None (anonymous).
@@ -93,6 +111,54 @@ class VisibilityModel(models.Model):
 
     return False
 
+  @classmethod
+  def filter_visible_to(cls, user, objects):
+    """
+    Return the objects of an already-loaded list that are visible to a
+    user, in their original order. Same rules as is_visible_to(), but the
+    family relations of the user are fetched at most once for the whole
+    list instead of once per family object.
+
+    Args:
+      user: A User instance or None (anonymous).
+      objects: Iterable of VisibilityModel instances.
+
+    Returns:
+      list: The visible objects.
+    """
+    objects = list(objects)
+    if user is None or not user.is_authenticated:
+      return [obj for obj in objects if obj.visibility == 'p']
+    family_owner_ids = None
+    visible = []
+    for obj in objects:
+      if obj.visibility in ['p', 'c'] or obj.user_id == user.pk:
+        visible.append(obj)
+      elif obj.visibility == 'f':
+        if family_owner_ids is None:
+          family_owner_ids = cls.get_family_owner_ids(user)
+        if obj.user_id in family_owner_ids:
+          visible.append(obj)
+    return visible
+
+  @classmethod
+  def get_family_owner_ids(cls, user):
+    """
+    Return the ids of users that have the given user in their family, with
+    one query. The relation follows VISIBILITY_FAMILY_LOOKUP from the owner
+    (default: user__preferences__family); an empty set is returned when it
+    is disabled or does not exist.
+    """
+    from django.contrib.auth import get_user_model
+    family_lookup = getattr(settings, 'VISIBILITY_FAMILY_LOOKUP', 'user__preferences__family')
+    if not family_lookup or not family_lookup.startswith('user__'):
+      return set()
+    user_model = get_user_model()
+    lookup = family_lookup[len('user__'):]
+    if not cls._lookup_path_exists(user_model, lookup):
+      return set()
+    return set(user_model._default_manager.filter(**{lookup: user}).values_list('pk', flat=True))
+
   @property
   def available_visibilities(self):
     return dict(self.visibility_choices)
@@ -1,4 +1,4 @@
-from .BaseModel import BaseModel, generate_public_id
+from .BaseModel import BaseModel, BaseManager, BaseQuerySet, generate_public_id
 from .VisibilityModel import VisibilityModel
 from .TranslationAliasMixin import TranslationAliasMixin
 from .Tag import *
@@ -215,7 +215,9 @@ export function createActionBinder({
       method = method.toUpperCase();
     }
 
-    const params = parseParams(el.dataset.params);
+    let params = parseParams(el.dataset.params);
+    // data-delta: ask the server to return only fragments of changed fields
+    if (el.hasAttribute('data-delta')) params = { ...(params || {}), delta: 1 };
     let body;
     const bodySpec = el.dataset.body;
 
@@ -266,6 +268,11 @@ export function createActionBinder({
         }
       }
 
+      if (res && res.changes) {
+        dbg('action:changes', res.changes);
+        el.dispatchEvent(new CustomEvent('cmnsd:changes', { bubbles: true, detail: res.changes }));
+      }
+
       if (el.dataset.refreshUrl) {
         const rUrl = el.dataset.refreshUrl;
         const rParams = parseParams(el.dataset.refreshParams);
@@ -73,7 +73,8 @@ export function getConfig() {
   return state.config;
 }
 
-// ✅ Re-export loadContent at top level
+// ✅ Re-export loadContent and loadNext at top level
 export const loadContent = loader.loadContent;
+export const loadNext = loader.loadNext;
 
 export { loader, actionBinder, dom, msg, api, dbg };
@@ -44,9 +44,12 @@ export function inject(container, payload) {
   return el;
 }
 
-export function update(container, payload) {
+export function update(container, payload, options = {}) {
   const el = resolveContainer(container);
 
+  // Skip when the container already shows this fragment (see fragment_hashes)
+  if (options.hash && el.dataset.fragmentHash === options.hash) return el;
+
   // Step 1: Dispose Bootstrap tooltips in this container
   if (window.bootstrap && bootstrap.Tooltip) {
     const tooltipEls = el.querySelectorAll('[data-bs-toggle="tooltip"]');
@@ -59,6 +62,8 @@ export function update(container, payload) {
   // Step 2: Replace content
   el.replaceChildren();
   el.appendChild(normalizePayload(payload));
+  if (options.hash) el.dataset.fragmentHash = options.hash;
+  else delete el.dataset.fragmentHash;
 
   // Step 3: Trigger event for other features
   const ev = new CustomEvent('cmnsd:content:applied', {
@@ -80,6 +85,9 @@ export function insert(container, payload, options = {}) {
   const el = resolveContainer(container);
   const position = options.position === 'top' ? 'top' : 'bottom';
 
+  // Appended content no longer matches the hash of the replaced fragment
+  delete el.dataset.fragmentHash;
+
   const nodes = toNodes(payload);
   const iterable = position === 'top' ? [...nodes].reverse() : nodes;
 
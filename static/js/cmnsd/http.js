@@ -42,7 +42,7 @@ export function toQuery(params) {
 // Generic request
 export async function request(method, url, opts = {}) {
   const cfg = getConfig();
-  const { params, data, headers = {}, signal } = opts;
+  const { params, data, headers = {}, signal, fragmentHashes } = opts;
 
   let finalUrl = url;
   const q = toQuery(params);
@@ -55,6 +55,12 @@ export async function request(method, url, opts = {}) {
     signal
   };
 
+  // Hashes of the fragments currently shown, per payload key. The server
+  // omits unchanged fragments and lists their keys in not_modified.
+  if (fragmentHashes && Object.keys(fragmentHashes).length) {
+    init.headers['X-Fragment-Hashes'] = JSON.stringify(fragmentHashes);
+  }
+
   // Add CSRF if needed
   if (['POST', 'PUT', 'PATCH', 'DELETE'].includes(method)) {
     if (!(data instanceof FormData)) {
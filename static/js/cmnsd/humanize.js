@@ -0,0 +1,75 @@
+// Relative dates for cmnsd.
+// Humanizes <time data-humanize> elements rendered by the humanize_date and
+// time_tag filters with HUMANIZE_DATE_CLIENT = True.
+//
+// Attributes on the element (set by the server):
+//   datetime                   ISO timestamp.
+//   data-humanize              Marks the element for humanizing.
+//   data-humanize-max-days     HUMANIZE_DATE_MAX_DAYS. Dates further away keep
+//                              the server-formatted text (HUMANIZE_DATE_FORMAT).
+//
+// Uses the same units as the server: minutes, hours, days (< 7), weeks (< 30
+// days) and months (30 days). Texts come from Intl.RelativeTimeFormat in the
+// language of <html lang>. Elements are refreshed every minute.
+// Indentation: 2 spaces. Docs in English.
+
+const REFRESH_MS = 60 * 1000;
+const DAY = 24 * 60 * 60 * 1000;
+let timer = null;
+let formatter = null;
+
+function getFormatter() {
+  if (!formatter) {
+    const lang = document.documentElement.lang || navigator.language || 'en';
+    formatter = new Intl.RelativeTimeFormat(lang, { numeric: 'auto' });
+  }
+  return formatter;
+}
+
+export function humanizeText(date, maxDays = 365, now = Date.now()) {
+  const delta = date.getTime() - now;
+  const abs = Math.abs(delta);
+  const sign = delta < 0 ? -1 : 1;
+  const days = Math.floor(abs / DAY);
+  if (days >= maxDays) return null;
+  const rtf = getFormatter();
+  if (days === 0) {
+    const hours = Math.floor(abs / 3600000);
+    const minutes = Math.floor((abs % 3600000) / 60000);
+    if (hours) return rtf.format(sign * hours, 'hour');
+    if (minutes) return rtf.format(sign * minutes, 'minute');
+    return rtf.format(0, 'second');
+  }
+  if (days < 7) return rtf.format(sign * days, 'day');
+  if (days < 30) return rtf.format(sign * Math.floor(days / 7), 'week');
+  return rtf.format(sign * Math.floor(days / 30), 'month');
+}
+
+export function humanizeElement(el, now = Date.now()) {
+  const date = new Date(el.getAttribute('datetime'));
+  if (isNaN(date)) return;
+  if (el.dataset.humanizeFallback === undefined) {
+    el.dataset.humanizeFallback = el.textContent;
+  }
+  const maxDays = parseInt(el.dataset.humanizeMaxDays || '365', 10);
+  const text = humanizeText(date, maxDays, now);
+  el.textContent = text === null ? el.dataset.humanizeFallback : text;
+}
+
+export function humanize(root = document) {
+  const now = Date.now();
+  root.querySelectorAll('time[data-humanize]').forEach(el => humanizeElement(el, now));
+}
+
+export function startRefresh(interval = REFRESH_MS) {
+  if (timer) clearInterval(timer);
+  timer = setInterval(() => humanize(), interval);
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+  humanize();
+  startRefresh();
+});
+document.addEventListener('cmnsd:content:applied', e => {
+  humanize(e.detail?.container || document);
+});
@@ -12,6 +12,25 @@
  * @param {() => any} deps.getConfig
  */
 export function createLoader({ get, update, insert, normalizeMessages, renderMessages, dbg, getConfig }) {
+  // Hashes of the fragments shown in the mapped containers, per payload key
+  function currentHashes(map) {
+    const hashes = {};
+    Object.entries(map).forEach(([key, target]) => {
+      const el = typeof target === 'string' ? document.querySelector(target) : target;
+      if (el && el.dataset && el.dataset.fragmentHash) hashes[key] = el.dataset.fragmentHash;
+    });
+    return hashes;
+  }
+
+  // Position of a windowed field read (?limit=), used by loadNext
+  function storeWindow(target, win) {
+    const el = typeof target === 'string' ? document.querySelector(target) : target;
+    if (!el || !el.dataset) return;
+    el.dataset.windowCount = win.count;
+    if (win.next) el.dataset.windowNext = win.next;
+    else delete el.dataset.windowNext;
+  }
+
   async function loadContent({ url, params, map, mode = 'update', onDone } = {}) {
     if (!url) throw new Error('loadContent: url is required');
     if (!map || typeof map !== 'object') throw new Error('loadContent: map is required');
@@ -19,7 +38,7 @@ export function createLoader({ get, update, insert, normalizeMessages, renderMes
     dbg('loadContent:start', { url, params, keys: Object.keys(map), mode });
     let response;
     try {
-      response = await get(url, { params });
+      response = await get(url, { params, fragmentHashes: mode === 'update' ? currentHashes(map) : undefined });
     } catch (err) {
       // Network/parse failure
       renderMessages(
@@ -32,6 +51,9 @@ export function createLoader({ get, update, insert, normalizeMessages, renderMes
     }
 
     const data = response && response.payload ? response.payload : {};
+    const hashes = (response && response.fragment_hashes) || {};
+    const notModified = new Set((response && response.not_modified) || []);
+    const windows = (response && response.windows) || {};
 
     // ✅ Always show messages if present
     const msgs = normalizeMessages(response);
@@ -51,6 +73,10 @@ export function createLoader({ get, update, insert, normalizeMessages, renderMes
     // ✅ Only distribute payload if ok
     if (response.ok) {
       Object.entries(map).forEach(([key, target]) => {
+        if (notModified.has(key)) {
+          dbg('loadContent:skip (not modified)', { key });
+          return;
+        }
         if (!(key in data)) {
           dbg('loadContent:skip (missing key)', { key });
           return;
@@ -59,10 +85,11 @@ export function createLoader({ get, update, insert, normalizeMessages, renderMes
         try {
           mode === 'insert'
             ? insert(target, data[key])
-            : update(target, data[key]);
+            : update(target, data[key], { hash: hashes[key] });
         } catch (err) {
           console.warn('[cmnsd:loadContent] failed to update container', { target, err });
         }
+        if (windows[key]) storeWindow(target, windows[key]);
       });
     }
 
@@ -71,5 +98,27 @@ export function createLoader({ get, update, insert, normalizeMessages, renderMes
     return response;
   }
 
-  return { loadContent };
+  // Appends the next window of each windowed field read to its container.
+  // Every field is sent its own cursor as after[<key>]; fields without a next
+  // window are left out. Returns null when no container has a next window.
+  async function loadNext({ url, params, map, onDone } = {}) {
+    if (!map || typeof map !== 'object') throw new Error('loadNext: map is required');
+    const cursors = {};
+    const nextMap = {};
+    Object.entries(map).forEach(([key, target]) => {
+      const el = typeof target === 'string' ? document.querySelector(target) : target;
+      const next = el && el.dataset ? el.dataset.windowNext : undefined;
+      if (next) {
+        cursors[`after[${key}]`] = next;
+        nextMap[key] = target;
+      }
+    });
+    if (!Object.keys(nextMap).length) {
+      dbg('loadNext:skip (no next window)', { url });
+      return null;
+    }
+    return loadContent({ url, params: { ...params, ...cursors }, map: nextMap, mode: 'insert', onDone });
+  }
+
+  return { loadContent, loadNext };
 }
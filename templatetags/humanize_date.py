@@ -2,6 +2,7 @@ from django import template
 from django.utils import timezone
 from django.utils.translation import pgettext
 from django.utils.formats import date_format
+from django.utils.html import format_html
 from django.conf import settings
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
@@ -28,9 +29,16 @@ def humanize_date(value, fmt=None):
   Configurable via settings.py:
       HUMANIZE_DATE_MAX_DAYS = 365
       HUMANIZE_DATE_FORMAT = "l j F Y H:i"
+      HUMANIZE_DATE_CLIENT = False
+
+  With HUMANIZE_DATE_CLIENT the output does not depend on the current time:
+  a <time> element with the formatted date is returned (see time_tag) and
+  humanized in the browser by static/js/cmnsd/humanize.js.
   """
   if not value:
     return ""
+  if getattr(settings, "HUMANIZE_DATE_CLIENT", False):
+    return time_tag(value, fmt)
 
   # --- Load config values ---
   max_days = getattr(settings, "HUMANIZE_DATE_MAX_DAYS", 365)
@@ -86,6 +94,39 @@ def humanize_date(value, fmt=None):
   # Use Django's locale-aware date_format (instead of strftime)
   return date_format(local_value, fmt, use_l10n=True)
 
+def _normalize(value):
+  """ Return value as an aware datetime. """
+  if isinstance(value, date) and not isinstance(value, datetime):
+    return datetime(value.year, value.month, value.day, tzinfo=timezone.get_current_timezone())
+  if timezone.is_naive(value):
+    return timezone.make_aware(value, timezone.get_current_timezone())
+  return value
+
+@register.filter
+def time_tag(value, fmt=None):
+  """
+  Render a date or datetime as a <time> element with the ISO timestamp
+  and the date formatted with fmt (default: HUMANIZE_DATE_FORMAT). The
+  output depends only on the value, so fragments containing it can be
+  cached. With HUMANIZE_DATE_CLIENT the element is marked for humanize.js,
+  which shows relative text within HUMANIZE_DATE_MAX_DAYS.
+
+  Usage:
+      {{ mydate|time_tag }}
+      {{ mydate|time_tag:"j F Y" }}
+  """
+  if not value or not isinstance(value, date):
+    return ""
+  fmt = fmt or getattr(settings, "HUMANIZE_DATE_FORMAT", "l j F Y H:i")
+  local_value = timezone.localtime(_normalize(value)).replace(microsecond=0)
+  formatted = date_format(local_value, fmt, use_l10n=True)
+  if not getattr(settings, "HUMANIZE_DATE_CLIENT", False):
+    return format_html('<time datetime="{}">{}</time>', local_value.isoformat(), formatted)
+  return format_html(
+    '<time datetime="{}" title="{}" data-humanize data-humanize-max-days="{}">{}</time>',
+    local_value.isoformat(), formatted, getattr(settings, "HUMANIZE_DATE_MAX_DAYS", 365), formatted,
+  )
+
 @register.filter
 def calc_age(event_date, birth_date):
   """
@@ -2,7 +2,7 @@ from django import template
 from django.template.defaultfilters import stringfilter
 from django.utils.safestring import mark_safe
 
-import markdown as md
+from cmnsd.models.MarkdownCache import render_markdown_cached
 
 register = template.Library()
 
@@ -10,4 +10,7 @@ register = template.Library()
 @register.filter()
 @stringfilter
 def markdown(value):
-  return mark_safe(md.markdown(value, extensions=['markdown.extensions.fenced_code', 'nl2br', 'tables']))
+  ''' Render markdown to HTML. Results are cached per process by a hash of the value;
+      prefer stored HTML (MarkdownCacheMixin) where available.
+  '''
+  return mark_safe(render_markdown_cached(value))
@@ -23,32 +23,24 @@ def filter_by_user(queryset, user):
 @register.filter
 def filter_by_visibility(queryset, user):
     ''' Add private objects for current user to queryset '''
+    from cmnsd.models.VisibilityModel import VisibilityModel
+    from cmnsd.models.UserExclusions import exclude_for_user
+    model = queryset.model
+    if issubclass(model, VisibilityModel):
+      queryset = model.filter_visibility(queryset, user=user)
+    elif any(f.name == 'visibility' for f in model._meta.get_fields()):
+      queryset = VisibilityModel.filter_visibility(queryset, user=user)
     if user.is_authenticated:
-      ''' Process visibility filters '''
-      queryset =  queryset.filter(visibility='p') |\
-                  queryset.filter(visibility='c') |\
-                  queryset.filter(visibility='f', user=user) |\
-                  queryset.filter(visibility='f', user__profile__family=user) |\
-                  queryset.filter(visibility='q', user=user)
-      if hasattr(user, 'profile'):
-        ''' Process the dislike filter '''
-        if user.profile.hide_least_liked:
-          if hasattr(queryset.first(), 'slug'):
-            queryset = queryset.exclude(slug__in=user.profile.dislike.values_list('slug', flat=True))
-          elif 'Comment.Comment' in str(type(queryset.first())):
-            queryset = queryset.exclude(location__slug__in=user.profile.dislike.values_list('slug', flat=True))
-        ''' Process Ignored Tags '''
-        if user.profile.ignored_tags.all().count() > 0:
-          if hasattr(queryset.first(), 'tags'):
-            queryset = queryset.exclude(tags__in=user.profile.ignored_tags.all()).exclude(tags__parent__in=user.profile.ignored_tags.all())
-          elif 'Tag.Tag' in str(type(queryset.first())):
-            queryset = queryset.exclude(id__in=user.profile.ignored_tags.values_list('id', flat=True)).exclude(parent__in=user.profile.ignored_tags.all())
-          elif 'Comment.Comment' in str(type(queryset.first())):
-            queryset = queryset.exclude(location__tags__in=user.profile.ignored_tags.all()).exclude(location__tags__parent__in=user.profile.ignored_tags.all())
-    else:
-      queryset =  queryset.filter(visibility='p')
+      ''' Process the dislike and ignored tags filters '''
+      queryset = exclude_for_user(queryset, user)
     return queryset.distinct()
 
+@register.filter
+def visible_to(objects, user):
+  ''' Return the objects of a list or queryset that are visible to user '''
+  from cmnsd.models.VisibilityModel import VisibilityModel
+  return VisibilityModel.filter_visible_to(user, objects)
+
 @register.filter
 def without(queryset, exclude_object):
   ''' Exclude objects from a queryset or list '''
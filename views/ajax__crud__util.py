@@ -1,6 +1,25 @@
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
+
+class StatementCounter:
+  """
+  Database execute wrapper that counts the statements issued while active.
+
+  Usage:
+    counter = StatementCounter()
+    with connection.execute_wrapper(counter):
+      ...
+    counter.count  # number of statements executed
+  """
+  def __init__(self):
+    self.count = 0
+
+  def __call__(self, execute, sql, params, many, context):
+    self.count += 1
+    return execute(sql, params, many, context)
+
+
 class CrudUtil:
   
   
@@ -0,0 +1,324 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import models, transaction, router, connections
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+import traceback
+
+from .ajax__crud__util import CrudUtil, StatementCounter
+from .ajax_utils_meta_object import meta_object
+from .ajax_utils_meta_field import meta_field
+from cmnsd.models.ObjectCache import invalidate_cached_objects
+
+class CrudBulk(CrudUtil):
+  ''' CRUD Bulk actions
+      Apply the same change to many objects of one model in a single request.
+  '''
+  bulk_actions = ['update', 'delete', 'restore']
+  bulk_identifiers = {
+    'object_ids': 'pk',
+    'object_tokens': 'token',
+  }
+
+  def is_bulk_request(self):
+    """
+    Return True if the request addresses a list of objects through
+    ``object_ids`` or ``object_tokens`` instead of a single object.
+    """
+    lookup, values = self._get_bulk_identifiers()
+    return bool(values)
+
+  def _get_bulk_identifiers(self):
+    """
+    Return the lookup field and the list of identifiers supplied in the request.
+
+    Identifiers can be supplied as a comma-separated string or as a JSON list:
+      object_ids=1,2,3
+      {"object_tokens": ["abc", "def"]}
+
+    Returns:
+      tuple: (lookup, values) where lookup is 'pk' or 'token', or (None, []).
+    """
+    for key, lookup in self.bulk_identifiers.items():
+      value = self.get_value_from_request(key, silent=True)
+      if not value:
+        continue
+      if isinstance(value, (list, tuple)):
+        values = [str(v).strip() for v in value]
+      else:
+        values = [v.strip() for v in str(value).split(',')]
+      return lookup, list(dict.fromkeys(v for v in values if v))
+    return None, []
+
+  def crud__bulk(self, action=None):
+    """
+    Apply a bulk action to all objects addressed by ``object_ids`` or ``object_tokens``.
+
+    Supported actions (``?bulk=<action>``, DELETE requests always use 'delete'):
+      - update:  set simple fields (e.g. ``visibility=q``) and add or remove
+                 many-to-many relations (e.g. ``tags__add__slug=pool``).
+      - delete:  mark objects as deleted (status 'x'), or delete objects of
+                 models without a status field.
+      - restore: set deleted objects back to DEFAULT_MODEL_STATUS.
+
+    Fields are checked with the same rules as single-object updates (meta_field)
+    and objects are scoped with FilterMixin. Writes are issued with
+    ``queryset.update()`` and ``bulk_create()`` in one transaction; model save()
+    methods and save signals are not called. The caches those signals keep
+    are cleared for the changed objects: object and @ajax_function result
+    versions, PageModel resolutions and BaseCommentCounter counters (rebuilt
+    for the affected targets).
+
+    The payload contains a per-object result summary under 'bulk'. The model list
+    is only rendered when ``render`` is passed in the request.
+    """
+    self.update_statements = 0
+    action = action or self.get_value_from_request('bulk', silent=True, default='update')
+    action = str(action).lower()
+    summary = {'action': action, 'requested': 0, 'changed': 0, 'results': []}
+    try:
+      if action not in self.bulk_actions:
+        raise ValueError(_("'{}' is not a valid bulk action, choose from {}").format(action, ', '.join(self.bulk_actions)).capitalize())
+      if not self.model:
+        raise ValueError(_("no model detected for bulk {}").format(action).capitalize())
+      lookup, values = self._get_bulk_identifiers()
+      max_objects = getattr(settings, 'AJAX_BULK_MAX_OBJECTS', 500)
+      if len(values) > max_objects:
+        raise ValueError(_("bulk {} is limited to {} objects, {} supplied").format(action, max_objects, len(values)).capitalize())
+      if lookup == 'token' and not self.model.has_field('token'):
+        raise ValueError(_("model '{}' has no token field").format(self.model.name).capitalize())
+      summary['requested'] = len(values)
+      changes = self._get_bulk_changes(action)
+      using = router.db_for_write(self.model.model)
+      counter = StatementCounter()
+      with transaction.atomic(using=using), connections[using].execute_wrapper(counter):
+        summary['results'] = self.__bulk_apply(action, lookup, values, changes)
+      self.update_statements = counter.count
+      summary['changed'] = len([result for result in summary['results'] if result['result'] in ['updated', 'deleted', 'restored']])
+      if summary['changed'] > 0:
+        self.messages.add(_("bulk {} applied to {} of {} {}").format(action, summary['changed'], summary['requested'], self.model._meta.verbose_name_plural).capitalize(), 'success')
+      else:
+        self.messages.add(_("bulk {} made no changes").format(action).capitalize(), 'info')
+    except PermissionDenied as e:
+      self.messages.add(str(e), 'error')
+      self.status = 403
+    except ValueError as e:
+      self.messages.add(str(e), 'error')
+      self.status = 400
+    except Exception as e:
+      staff_message = ''
+      if getattr(settings, 'DEBUG', False):
+        staff_message = ': ' + str(e)
+        traceback.print_exc()
+      self.messages.add(_("an unexpected error occured during bulk {}{}").capitalize().format(action, staff_message), 'error')
+      self.status = 400
+    payload = {'bulk': summary}
+    if self.get_value_from_request('render', silent=True):
+      format = self.get_value_from_request('format', silent=True, default='html')
+      payload[self.model.name] = self.render_model(self.model, format=format)
+    return payload
+
+  def _get_bulk_changes(self, action):
+    """
+    Build the changes for a bulk update from the request payload.
+
+    Returns:
+      dict: {'simple': {field: value}, 'add': {field: [objs]}, 'remove': {field: [objs]}}
+
+    Raises:
+      PermissionDenied: If a field is protected (see meta_field).
+      ValueError: If a field is not supported in bulk or a related object is not found.
+    """
+    changes = {'simple': {}, 'add': {}, 'remove': {}}
+    if action != 'update':
+      return changes
+    # Use an unsaved instance so model-level field protection is applied
+    template = meta_object(self.model, obj=self.model.model(), view=self)
+    for key, value in self._get_payload().items():
+      if not self.model.has_field(key):
+        continue
+      field = meta_field(template, key, self.request)
+      if field.is_simple():
+        value = field.clean_value(value)
+        # queryset.update() skips model validation, so verify choices here
+        choices = getattr(field.field(), 'choices', None)
+        if choices and value not in [choice for choice, label in choices]:
+          raise ValueError(_("invalid choice '{}' for field '{}'").format(value, key).capitalize())
+        changes['simple'][key] = value
+      elif isinstance(field.field(), models.ManyToManyField) and isinstance(value, dict) and \
+           set(value.keys()) & {'add', 'remove'}:
+        for operation in ['add', 'remove']:
+          if operation not in value:
+            continue
+          identifiers = value[operation]
+          if not isinstance(identifiers, dict):
+            # A plain value is matched on slug when available, otherwise on id
+            related_fields = [f.name for f in field.related_model()._meta.get_fields()]
+            identifiers = {'slug' if 'slug' in related_fields else 'id': identifiers}
+          related_obj = field.find_related_object(identifiers)
+          if not related_obj:
+            raise ValueError(_("no {} found for {}").format(field.related_model()._meta.verbose_name, identifiers).capitalize())
+          changes[operation].setdefault(key, []).append(related_obj)
+      else:
+        raise ValueError(_("field '{}' of type {} is not supported in bulk updates").format(key, field.get_type()).capitalize())
+    if not any(changes.values()):
+      raise ValueError(_("no changes supplied for bulk update").capitalize())
+    return changes
+
+  def _get_bulk_queryset(self, action):
+    """
+    Return the queryset of objects the current user may apply ``action`` to.
+
+    Update and delete use the regular FilterMixin scoping. Deleted objects are
+    hidden by that scoping, so restore only allows the owner (or staff) to
+    restore objects they are allowed to see.
+    """
+    queryset = self.model.model.objects.all()
+    if action != 'restore':
+      if hasattr(self, 'filter'):
+        queryset = self.filter(queryset, suppress_search=True)
+      return queryset
+    if not self.model.has_field('status'):
+      raise ValueError(_("model '{}' has no status field and cannot be restored").format(self.model.name).capitalize())
+    queryset = queryset.filter(status='x')
+    if hasattr(self, '_filter_by_restrict_access'):
+      queryset = self._filter_by_restrict_access(queryset)
+    if hasattr(self, 'filter_visibility'):
+      queryset = self.filter_visibility(queryset)
+    if not self.request.user.is_staff:
+      if not self.request.user.is_authenticated or not self.model.has_field('user'):
+        return queryset.none()
+      queryset = queryset.filter(user=self.request.user)
+    return queryset
+
+  def __bulk_apply(self, action, lookup, values, changes):
+    """ Apply the action and return a result entry per requested identifier. """
+    model = self.model.model
+    simple = changes['simple']
+    has_token = self.model.has_field('token')
+    columns = ['pk'] + (['token'] if has_token else []) + list(simple.keys())
+    if action in ['delete', 'restore'] and self.model.has_field('status'):
+      columns.append('status')
+    # Columns needed to clear caches that save() and its signals would clear
+    columns += [field for field in self.__get_cache_columns(model) if field not in columns]
+    rows = {}
+    for row in self._get_bulk_queryset(action).filter(**{f'{lookup}__in': values}).values(*columns):
+      rows[str(row[lookup])] = row
+    # Tell apart objects that do not exist from objects that are out of scope
+    missing = [value for value in values if value not in rows]
+    existing = set()
+    if missing:
+      existing = {str(value) for value in model.objects.filter(**{f'{lookup}__in': missing}).values_list(lookup, flat=True)}
+    ids = [row['pk'] for row in rows.values()]
+    changed = set()
+    result_label = {'update': 'updated', 'delete': 'deleted', 'restore': 'restored'}[action]
+    auto_now = {f.name: timezone.now() for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)}
+
+    if action == 'update':
+      # Simple fields: only write rows where at least one value differs
+      if simple:
+        changed |= {row['pk'] for row in rows.values() if any(str(row[field]) != str(value) for field, value in simple.items())}
+        if changed:
+          model.objects.filter(pk__in=changed).update(**simple, **auto_now)
+      # Many-to-many: one insert and one delete per related object
+      for field, related_objs in changes['add'].items():
+        changed |= self.__bulk_m2m(field, related_objs, ids, add=True)
+      for field, related_objs in changes['remove'].items():
+        changed |= self.__bulk_m2m(field, related_objs, ids, add=False)
+    elif action == 'delete':
+      if self.model.has_field('status'):
+        changed = {row['pk'] for row in rows.values() if row['status'] != 'x'}
+        if changed:
+          model.objects.filter(pk__in=changed).update(status='x', **auto_now)
+      else:
+        changed = set(ids)
+        if changed:
+          model.objects.filter(pk__in=changed).delete()
+    elif action == 'restore':
+      changed = set(ids)
+      if changed:
+        model.objects.filter(pk__in=changed).update(status=getattr(settings, 'DEFAULT_MODEL_STATUS', 'p'), **auto_now)
+    # queryset.update() sends no save signals: clear the caches they would clear
+    self.__invalidate_caches(model, changed, rows, changes)
+
+    results = []
+    for value in values:
+      row = rows.get(value)
+      if row is None:
+        result = 'no permission' if value in existing else 'not found'
+        results.append({lookup if lookup != 'pk' else 'id': value, 'result': result})
+        continue
+      entry = {'id': row['pk']}
+      if has_token:
+        entry['token'] = row['token']
+      entry['result'] = result_label if row['pk'] in changed else 'unchanged'
+      results.append(entry)
+    return results
+
+  def __get_comment_counters(self, model):
+    """ Return the BaseCommentCounter models counting comments of model. """
+    from django.apps import apps
+    from cmnsd.models.CommentCounter import BaseCommentCounter
+    return [counter for counter in apps.get_models() if issubclass(counter, BaseCommentCounter) and counter.get_comment_model() is model]
+
+  def __get_cache_columns(self, model):
+    """ Return the columns __invalidate_caches() needs from the rows before they are written. """
+    columns = []
+    if hasattr(model, 'invalidate_page_cache'):
+      columns.append('slug')
+    if self.__get_comment_counters(model):
+      columns += ['content_type_id', 'object_id']
+    return columns
+
+  def __invalidate_caches(self, model, changed, rows, changes):
+    """
+    Clear what save() and its signals would have cleared for the changed
+    objects: object and function result versions (also of related objects
+    added or removed), cached page resolutions and comment counters.
+    """
+    if not changed:
+      return
+    invalidate_cached_objects(model, changed)
+    for related_objs in list(changes['add'].values()) + list(changes['remove'].values()):
+      for related_obj in related_objs:
+        invalidate_cached_objects(related_obj.__class__, [related_obj.pk])
+    changed_rows = [row for row in rows.values() if row['pk'] in changed]
+    if hasattr(model, 'invalidate_page_cache'):
+      slugs = {row['slug'] for row in changed_rows}
+      if 'slug' in changes['simple']:
+        slugs.add(changes['simple']['slug'])
+      model.invalidate_page_cache(slugs)
+    counters = self.__get_comment_counters(model)
+    if counters:
+      from django.contrib.contenttypes.models import ContentType
+      targets = {}
+      for row in changed_rows:
+        targets.setdefault(row['content_type_id'], set()).add(row['object_id'])
+      for counter in counters:
+        for content_type_id, object_ids in targets.items():
+          counter.rebuild(ContentType.objects.get_for_id(content_type_id), object_ids)
+
+  def __bulk_m2m(self, field_name, related_objs, ids, add=True):
+    """
+    Add or remove related objects on a many-to-many field for all ids
+    through the intermediate model.
+
+    Returns:
+      set: The ids of objects whose relations changed.
+    """
+    field = self.model.model._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    changed = set()
+    for related_obj in related_objs:
+      linked = set(through.objects.filter(**{f'{source}_id__in': ids, f'{target}_id': related_obj.pk}).values_list(f'{source}_id', flat=True))
+      if add:
+        new = [pk for pk in ids if pk not in linked]
+        through.objects.bulk_create([through(**{f'{source}_id': pk, f'{target}_id': related_obj.pk}) for pk in new], ignore_conflicts=True)
+        changed |= set(new)
+      else:
+        if linked:
+          through.objects.filter(**{f'{source}_id__in': linked, f'{target}_id': related_obj.pk}).delete()
+        changed |= linked
+    return changed
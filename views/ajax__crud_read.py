@@ -3,7 +3,11 @@ import traceback
 class CrudRead:
   ''' CRUD Read action
   '''
-  def crud__read(self):
+  def crud__read(self, only=None):
+    ''' Render the requested fields, functions, object or model.
+        When only is a list, only the fields and functions named in it are
+        rendered; an empty list renders nothing.
+    '''
     # Build Payload
     payload = {}
     format = self.get_value_from_request('format', silent=True, default='html')
@@ -13,11 +17,18 @@ class CrudRead:
         if hasattr(self.obj, 'fields') and self.obj.fields:
           # If fields are detected, add the rendered fields to the payload
           for field in self.obj.fields:
+            if only is not None and field not in only:
+              continue
             payload[field] = self.render_field(field, format=format)
         if hasattr(self.obj, 'functions') and self.obj.functions:
           # If functions are detected, add the rendered functions to the payload
           for function in self.obj.functions:
+            if only is not None and function not in only:
+              continue
             payload[function] = self.render_field(function, format=format)
+      elif only is not None and not only:
+        # Nothing to render
+        pass
       elif self.obj.is_found():
         # If only object is detected, add the rendered object to the payload
         payload[self.model.name] = self.render_obj(self.obj, format=format)
@@ -1,8 +1,9 @@
 from django.conf import settings
+from django.db import transaction, router, connections
 from django.utils.translation import gettext_lazy as _
 import traceback
 
-from .ajax__crud__util import CrudUtil
+from .ajax__crud__util import CrudUtil, StatementCounter
 from .ajax_utils_meta_object import meta_object
 from .ajax_utils_meta_field import meta_field
 
@@ -22,12 +23,20 @@ class CrudUpdate(CrudUtil):
       print("UPDATE OBJECT:", self.obj, "of model", self.model)
       print("PAYLOAD:", payload)
       print("ACTIONS:", actions)
-    # Update fields in a safe order: simple, bool, foreign_key, related
+    # Update fields in a safe order: simple, bool, foreign_key, related.
+    # All writes run in a single transaction; the object is only saved when
+    # fields changed and related writes are flushed in bulk at the end.
+    using = router.db_for_write(self.model.model)
+    counter = StatementCounter()
+    committed = False
     try:
-      self.__update_simple_fields(obj, actions)
-      self.__update_foreign_key_fields(obj, actions)
-      obj.commit()
-      self.__update_related_fields(obj, actions)
+      with transaction.atomic(using=using), connections[using].execute_wrapper(counter):
+        self.__update_simple_fields(obj, actions)
+        self.__update_foreign_key_fields(obj, actions)
+        obj.commit()
+        self.__update_related_fields(obj, actions)
+        obj.flush()
+      committed = True
       if obj.count_changes() > 0:
         self.messages.add(obj.get_changes(), 'success')
     except ValueError as e:
@@ -38,9 +47,36 @@ class CrudUpdate(CrudUtil):
         staff_message = ': ' + str(e)
         traceback.print_exc()
       self.messages.add(_("an unexpected error occured when updating fields of {}{}").capitalize().format(str(obj), staff_message), 'error')
+    self.update_statements = counter.count
     # self.__process_changes(obj)
     self.modes = self.guess_modes()
+    if self.is_delta_response():
+      # Only re-render requested fields that changed. Functions may depend on
+      # any field, so they are re-rendered whenever something changed.
+      changed_fields = obj.get_changed_field_names() if committed else []
+      only = [field for field in obj.fields if field in changed_fields]
+      if changed_fields:
+        only += obj.functions
+      self.update_changes = {
+        'fields': changed_fields,
+        'rendered': only,
+        'unchanged': [field for field in obj.fields + obj.functions if field not in only],
+        'log': obj.get_change_summary() if committed else [],
+      }
+      return self.crud__read(only=only)
     return self.crud__read()
+
+  def is_delta_response(self):
+    """
+    Return True if the update response should only contain changed fields.
+
+    Enabled per request with ``delta=1`` or for all updates with the
+    AJAX_DELTA_RESPONSE setting.
+    """
+    value = self.get_value_from_request('delta', silent=True, default=getattr(settings, 'AJAX_DELTA_RESPONSE', False))
+    if isinstance(value, bool):
+      return value
+    return str(value).lower() in ['1', 'true', 'yes', 'on']
     
   def __resolve_generic_relation(self, obj):
     """
@@ -260,7 +296,7 @@ class CrudUpdate(CrudUtil):
         instance.user = self.request.user
 
       # Wrap the instance inside a meta_object
-      obj = meta_object(self.model, obj=instance)
+      obj = meta_object(self.model, obj=instance, view=self)
 
       # Record creation in update log
       self.update_results.append({
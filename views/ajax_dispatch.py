@@ -15,10 +15,11 @@ from .ajax_utils_meta_function import meta_function
 from .ajax__crud_read import CrudRead
 from .ajax__crud_update import CrudUpdate
 from .ajax__crud_delete import CrudDelete
+from .ajax__crud_bulk import CrudBulk
 
 ''' Meta classes for detection and dispatching
 '''
-class AjaxDispatch(MessageMixin, FilterMixin, RequestMixin, ResponseMixin, CrudRead, CrudUpdate, CrudDelete, View):
+class AjaxDispatch(MessageMixin, FilterMixin, RequestMixin, ResponseMixin, CrudRead, CrudUpdate, CrudDelete, CrudBulk, View):
     
   def __init__(self):
     super().__init__()
@@ -106,7 +107,9 @@ class AjaxDispatch(MessageMixin, FilterMixin, RequestMixin, ResponseMixin, CrudR
     self.obj = meta_object( self.model, 
                             qs=base_qs,
                             **identifiers,
-                            none=True)
+                            none=True,
+                            cached=hasattr(self, 'filter'),
+                            view=self)
     return self.obj
   
   def _detect_fields(self):
@@ -153,13 +156,25 @@ class AjaxDispatch(MessageMixin, FilterMixin, RequestMixin, ResponseMixin, CrudR
   
   def post(self, request, *args, **kwargs):
     self.modes = self.guess_modes()
-    return self.return_response(payload=self.crud__update())
+    if self.is_bulk_request():
+      payload = self.crud__bulk()
+    else:
+      payload = self.crud__update()
+    extra = {'changes': self.update_changes} if getattr(self, 'update_changes', None) is not None else {}
+    return self.return_response(payload=payload, statements=getattr(self, 'update_statements', 0), **extra)
 
   def patch(self, request, *args, **kwargs):
     self.modes = self.guess_modes()
-    return self.return_response(payload=self.crud__update())
+    if self.is_bulk_request():
+      payload = self.crud__bulk()
+    else:
+      payload = self.crud__update()
+    extra = {'changes': self.update_changes} if getattr(self, 'update_changes', None) is not None else {}
+    return self.return_response(payload=payload, statements=getattr(self, 'update_statements', 0), **extra)
   
   def delete(self, request, *args, **kwargs):
     self.modes = self.guess_modes()
-    
+    if self.is_bulk_request():
+      payload = self.crud__bulk(action='delete')
+      return self.return_response(payload=payload, statements=self.update_statements)
     return self.return_response(payload=self.crud__delete())
\ No newline at end of file
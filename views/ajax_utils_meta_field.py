@@ -8,9 +8,14 @@ from uuid import UUID
 import traceback
 import json
 
+from cmnsd.models.ObjectCache import get_cached_object, cache_object
+from cmnsd.models.IdentityMap import get_identity_map
+from cmnsd.mixins.FilterMixin import FilterMixin
+
 class meta_field:
   def __init__(self, obj, field_name, request=None):
     self.request = getattr(obj, 'request', request)
+    self.view = getattr(obj, 'view', None)
     self.obj = obj
     self.field_name = field_name
     self.__field = None
@@ -185,8 +190,13 @@ class meta_field:
     if hasattr(self, "_value_cached") and self._value_cached:
       return self.__value
 
+    # Fill foreign keys from rows already loaded in this request
+    identity_map = get_identity_map(self.request)
+    identity_map.attach(self.obj.obj)
     # Default to None if the attribute does not exist
     value = getattr(self.obj.obj, self.field_name, None)
+    if isinstance(value, models.Model):
+      value = identity_map.attach(identity_map.add(value))
 
     # Case 1: Related manager (e.g. ManyToMany or reverse FK)
     if hasattr(value, "all") and callable(value.all):
@@ -499,6 +509,26 @@ class meta_field:
       # Gracefully return the original value when unsure (safe default)
       return value
 
+  def clean_value(self, value):
+    """
+    Cast a raw request value to the field's Python type and normalize
+    display labels to stored choice values.
+
+    Raises:
+      ValueError: If the value cannot be cast to the field type.
+    """
+    return self.__normalize_choices(self.__cast_type(value))
+
+  def find_related_object(self, identifiers):
+    """
+    Look up an existing related object by identifiers (id, slug, token or
+    other field values) without creating it.
+
+    Returns:
+      Optional[Model]: The related object, or None if it does not exist.
+    """
+    return self.__get_related_object(identifiers)
+
   """ Field Modification methods """
   def update_simple(self, new_value):
     """
@@ -522,8 +552,7 @@ class meta_field:
     if not self.is_simple():
       raise ValueError(_("cannot update {}'s simple field '{}' with value '{}' because value does not belong to a {}").capitalize().format(self.obj().name, self.field_name, str(new_value), 'simple field'))
     # Type cast according to the field definition
-    new_value = self.__cast_type(new_value)
-    new_value = self.__normalize_choices(new_value)
+    new_value = self.clean_value(new_value)
     # Fetch the current stored value
     old_value = self.value()
     # Skip update if the new value is effectively unchanged
@@ -599,9 +628,12 @@ class meta_field:
       return self.__update_reverse_fk(related_identifiers)
     # Find related object based on related_identifiers
     related_obj = self.__get_related_object(related_identifiers)
+    # A link found by the canonical form of its URL is attached as it is,
+    # never edited to match the posted variant of the URL
+    editable = not self.__is_canonical_match(related_obj, related_identifiers)
     # Check if related object has field changes
     changes_made = False
-    for field in related_identifiers:
+    for field in (related_identifiers if editable else []):
       if hasattr(related_obj, field):
         new_value = related_identifiers[field]
         current_value = getattr(related_obj, field, None)
@@ -621,19 +653,21 @@ class meta_field:
             'new_value': str(new_value),
           })
           changes_made = True
-          related_obj.save()
+          self.obj.defer_save(related_obj, field)
     if changes_made:
       # Assume related object was just created/updated, so skip adding/removing it
       return True
-    current_value = self.value()
+    # Evaluated once; the membership test and change log reuse the rows
+    current_value = get_identity_map(self.request).evaluate(self.value())
     if not related_obj:
       related_obj = self.__create_related_object(related_identifiers)
     # If related object is already set, remove it
     if isinstance(current_value, QuerySet) and related_obj in current_value:
       # Remove related object from object field
       try:
-        getattr(self.obj.obj, self.field_name).remove(related_obj)
-        self.__value = related_obj
+        self.obj.defer_related(self.field_name, 'remove', related_obj)
+        # Read the related manager again once the queued change is written
+        self._value_cached = False
         self.obj.report_change({
           'field': self.name, 
           'old_value': str(current_value),
@@ -646,8 +680,9 @@ class meta_field:
     else:
       # Add related object to object field
       try:
-        getattr(self.obj.obj, self.field_name).add(related_obj)
-        self.__value = related_obj
+        self.obj.defer_related(self.field_name, 'add', related_obj)
+        # Read the related manager again once the queued change is written
+        self._value_cached = False
         self.obj.report_change({
           'field': self.name, 
           'old_value': str(current_value),
@@ -709,8 +744,8 @@ class meta_field:
                 'new_value': str(new_value),
               })
               changes_made = True
+              self.obj.defer_save(related_obj, field)
         if changes_made:
-          related_obj.save()
           return True
         # Already belongs, no field changes → toggle off (delete)
         try:
@@ -720,7 +755,7 @@ class meta_field:
             'new_value': None,
             'description': _("deleted '{}' '{}'").capitalize().format(str(related_obj._meta.verbose_name), str(related_obj)),
           })
-          related_obj.delete()
+          self.obj.defer_delete(related_obj)
         except Exception as e:
           staff_message = ': ' + str(e) if getattr(settings, 'DEBUG', False) or self.request.user.is_superuser else ''
           return ValueError(_("unable to delete '{}' '{}'{}").capitalize().format(str(related_obj._meta.verbose_name), str(related_obj), staff_message))
@@ -731,7 +766,7 @@ class meta_field:
         try:
           old_parent = getattr(related_obj, fk_field_name, None)
           setattr(related_obj, fk_field_name, self.obj.obj)
-          related_obj.save()
+          self.obj.defer_save(related_obj, fk_field_name)
           self.obj.report_change({
             'field': self.field_name,
             'old_value': str(old_parent),
@@ -752,6 +787,22 @@ class meta_field:
     return True
 
   ''' Foreign Key / Related Object Handling '''
+  def __get_filter(self):
+    """ Return the FilterMixin of the view, or a plain FilterMixin when the object was built without a view. """
+    return self.view if isinstance(self.view, FilterMixin) else FilterMixin()
+
+  def __get_readable_queryset(self, model):
+    """ Return the objects of model the request user may read, scoped by the view's FilterMixin.filter(). """
+    return self.__get_filter().filter(model._default_manager.all(), request=self.request, suppress_search=True)
+
+  def __is_canonical_match(self, related_obj, identifiers):
+    """ Return True if related_obj was found by the canonical URL of identifiers (Step 2b) rather than by id, slug or token. """
+    if related_obj is None or not hasattr(related_obj, 'canonicalize_url') or not isinstance(identifiers, dict):
+      return False
+    if any(key in identifiers for key in ['id', 'slug', 'token']) or not identifiers.get('url'):
+      return False
+    return related_obj.canonical_url == related_obj.canonicalize_url(identifiers['url'])
+
   def __get_related_object(self, identifiers, search_method='iexact', model=None, depth=0):
     """
     Fetch an existing related object by priority identifiers (id, slug, token).
@@ -818,13 +869,34 @@ class meta_field:
             continue  # Skip if field doesn’t exist
 
         value = resolved_identifiers[field_name]
+        identity_map = get_identity_map(self.request)
+        # Only objects the request user may read; a cached object is checked
+        # in memory, falling back to the query when the rules cannot decide
+        related_obj, version = get_cached_object(target_model, {field_name: value})
+        if related_obj is not None and self.__get_filter().is_readable(related_obj, self.request):
+          return identity_map.attach(identity_map.add(related_obj))
+        queryset = self.__get_readable_queryset(target_model)
         try:
-          return target_model._default_manager.get(**{field_name: value})
+          related_obj = queryset.get(**{field_name: value})
+          cache_object(related_obj, version)
+          return identity_map.attach(identity_map.add(related_obj))
         except target_model.DoesNotExist:
+          if target_model._default_manager.filter(**{field_name: value}).exists():
+            raise PermissionDenied(_("you do not have permission to access the requested {} with {} '{}'").format(target_model._meta.verbose_name, field_name, value).capitalize())
           return None
         except target_model.MultipleObjectsReturned:
           # Fall back to most recent or None
-          return target_model._default_manager.filter(**{field_name: value}).order_by("-pk").first()
+          return queryset.filter(**{field_name: value}).order_by("-pk").first()
+
+    # --- Step 2b: Identify links by canonical URL ---
+    # Models that store a canonical URL (BaseLink) reuse an existing row for
+    # variations of the same URL instead of creating a duplicate.
+    # Only links the request user may read (FilterMixin.filter() rules) are reused.
+    if resolved_identifiers.get("url") and hasattr(target_model, "canonicalize_url"):
+      canonical_url = target_model.canonicalize_url(resolved_identifiers["url"])
+      existing = self.__get_readable_queryset(target_model).filter(canonical_url=canonical_url).order_by("pk").first()
+      if existing:
+        return existing
 
     # --- Step 3: Fallback multi-field lookup ---
     q_obj = Q()
@@ -939,7 +1011,6 @@ class meta_field:
     # --- Create object normally ---
     try:
       related_obj = related_model.objects.create(**{**defaults, **resolved_identifiers})
-      related_obj.save()
 
       self.obj.report_change({
         "field": self.name,
@@ -3,6 +3,9 @@ from django.conf import settings
 import traceback
 import inspect
 
+from cmnsd.models.IdentityMap import get_identity_map
+from cmnsd.models.BaseMethods import get_function_cache_key, get_cached_function_result, cache_function_result
+
 
 class meta_function:
   def __init__(self, obj, function_name, request=None):
@@ -117,17 +120,23 @@ class meta_function:
 
     # Case 2: Callable property (method or computed attribute)
     elif callable(value):
+      function = value
       try:
-        # Attempt to call with `request` if function supports it
-        try:
-          req_args = self.get_required_arg_values()
-          value = value(request=self.request, **req_args)
-        except TypeError as e:
-          # Retry without request if it’s not accepted
-          if "unexpected keyword argument 'request'" in str(e):
-            value = value(**self.get_required_arg_values())
-          else:
-            raise e
+        req_args = self.get_required_arg_values()
+        # Results of @ajax_function(cache_ttl=...) come from the shared cache
+        cache_key = get_function_cache_key(self.obj.obj, function, req_args, self.request)
+        found, value = get_cached_function_result(cache_key)
+        if not found:
+          # Attempt to call with `request` if function supports it
+          try:
+            value = function(request=self.request, **req_args)
+          except TypeError as e:
+            # Retry without request if it’s not accepted
+            if "unexpected keyword argument 'request'" in str(e):
+              value = function(**req_args)
+            else:
+              raise e
+          cache_function_result(cache_key, function, value)
       except Exception as e:
         staff_message = (
           ": " + str(e)
@@ -140,6 +149,11 @@ class meta_function:
             .capitalize()
         )
 
+    # Reuse the request's instance of a returned row
+    if hasattr(value, '_meta') and getattr(value, 'pk', None) is not None:
+      identity_map = get_identity_map(self.request)
+      value = identity_map.attach(identity_map.add(value))
+
     # Cache the resolved value
     self.__value = value
     self._value_cached = True
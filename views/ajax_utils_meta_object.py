@@ -1,13 +1,20 @@
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.core.exceptions import PermissionDenied # , ObjectDoesNotExist, FieldDoesNotExist
+from django.db import models
 from django.db.models.query import QuerySet
 
 from .ajax_utils_meta_model import meta_model
+from cmnsd.models.ObjectCache import get_cached_object, cache_object
+from cmnsd.models.IdentityMap import get_identity_map
 
 class meta_object():
-  def __init__(self, model, qs=None, obj=None, none=True, search_mode='exact', request=None, *args, **kwargs):
+  def __init__(self, model, qs=None, obj=None, none=True, search_mode='exact', request=None, cached=False, view=None, *args, **kwargs):
     self.request = getattr(model, 'request', request)
+    # Use the object cache; qs must then hold the rules of FilterMixin.filter()
+    self.cached = True if cached is True else False
+    # The view whose FilterMixin decides which objects (also related ones) are readable
+    self.view = view
     self.obj = obj if obj and isinstance(obj, model.model) else None
     self.model = model if model and isinstance(model, meta_model) else None
     self.qs = qs if isinstance(qs, QuerySet) else None
@@ -17,9 +24,12 @@ class meta_object():
     self.fields = []
     self.functions = []
     self.__changes = []
+    self.__deferred = {'add': {}, 'remove': {}, 'save': {}, 'delete': {}}
     self.debug_messages = []
+    self.identity_map = get_identity_map(self.request)
     self.__validate()
     self.__detect()
+    self.identity_map.attach(self.obj)
     return None
   
   def __str__(self):
@@ -49,7 +59,7 @@ class meta_object():
     if self.obj:
       return self.obj
     identifiers = self.identifiers
-    qs = self.qs if self.qs else self.model.model.objects.all()
+    qs = self.qs if self.qs is not None else self.model.model.objects.all()
     # If the model does not have a slug, add token as identifier if available in the model
     if not self.__has_field('slug') and 'slug' in identifiers and \
            self.__has_field('token') and 'token' not in identifiers:
@@ -63,11 +73,23 @@ class meta_object():
       raise ValueError(_("no valid identifiers supplied for object lookup in model '{}'".format(self.model.name)).capitalize())
     # Ensure the queryset is searched properly according to the search_mode
     # e.g. for search_mode 'icontains', the identifier 'slug' becomes 'slug__icontains'
+    # Try the object cache first, checking access in memory with the rules
+    # of the view's FilterMixin; if those deny access or cannot decide, qs does
+    version = None
+    if self.cached and identifiers and self.search_mode == 'exact' and qs is not None:
+      obj, version = get_cached_object(self.model.model, identifiers)
+      if obj is not None and hasattr(self.view, 'is_readable') and self.view.is_readable(obj, self.request):
+        self.obj = self.identity_map.add(obj)
+        self.obj.request = self.request
+        return self.obj
     identifiers = {f"{k}__{self.search_mode}": v for k, v in identifiers.items()}
     # Try to fetch the object
-    if identifiers and qs:
+    if identifiers and qs is not None:
       try:
         self.obj = qs.get(**identifiers)
+        if self.cached and self.search_mode == 'exact':
+          cache_object(self.obj, version)
+        self.obj = self.identity_map.add(self.obj)
         self.obj.request = self.request
         return self.obj
       except qs.model.MultipleObjectsReturned:
@@ -83,20 +105,140 @@ class meta_object():
   
   ''' Save and Commit methods '''
   def commit(self):
+    """
+    Write the object to the database.
+
+    New objects are inserted in full. Existing objects are saved with
+    ``update_fields`` limited to the columns that changed; when nothing
+    changed, no statement is issued at all.
+
+    Returns:
+      bool: True if a write was issued, False if there was nothing to save.
+    """
     if not self.obj:
       raise ValueError(_("no object to commit changes to").capitalize())
     try:
-      self.obj.save()
+      if not self.exists():
+        self.obj.save()
+      else:
+        update_fields = self.get_changed_fields()
+        if not update_fields:
+          return False
+        self.obj.save(update_fields=update_fields)
     except Exception as e:
       staff_message = ': ' + str(e) if getattr(settings, 'DEBUG', False) or self.request.user.is_superuser else ''
       raise ValueError(_("error committing changes to {} '{}': {}{}".format(self.model._meta.verbose_name, self.obj, str(e), staff_message)).capitalize())
     return True
+
+  def get_changed_fields(self):
+    """
+    Return the concrete field names that need to be written for this object.
+
+    Uses the model's dirty-field tracking when available (BaseModel), and falls
+    back to the fields recorded through report_change(). auto_now fields such
+    as ``date_modified`` are only added when at least one other field changed.
+    """
+    concrete_fields = self.obj._meta.concrete_fields
+    if hasattr(self.obj, 'get_dirty_fields'):
+      fields = self.obj.get_dirty_fields()
+    else:
+      names = {f.name for f in concrete_fields}
+      fields = [change['field'] for change in self.__changes if change.get('field') in names]
+    fields = list(dict.fromkeys(fields))
+    if fields:
+      fields += [f.name for f in concrete_fields if getattr(f, 'auto_now', False) and f.name not in fields]
+    return fields
+
+  ''' Deferred related writes '''
+  def defer_related(self, field, action, related_obj):
+    """Queue an 'add' or 'remove' on the related manager of ``field``."""
+    objs = self.__deferred[action].setdefault(field, [])
+    if related_obj not in objs:
+      objs.append(related_obj)
+
+  def defer_save(self, related_obj, field=None):
+    """Queue a save of a related object, remembering which fields changed."""
+    key = (related_obj.__class__, related_obj.pk or id(related_obj))
+    entry = self.__deferred['save'].setdefault(key, {'object': related_obj, 'fields': []})
+    if field and field not in entry['fields']:
+      entry['fields'].append(field)
+
+  def defer_delete(self, related_obj):
+    """Queue a delete of a related object."""
+    self.__deferred['delete'].setdefault(related_obj.__class__, []).append(related_obj)
+
+  def count_deferred(self):
+    return sum(len(items) for items in self.__deferred.values())
+
+  def flush(self):
+    """
+    Write all queued related changes in bulk.
+
+    Related manager adds and removes are issued once per field for all queued
+    objects. Each related object is saved once, limited to its changed columns,
+    so model save() logic still runs. Deletes are issued once per related model,
+    or per object for models that override delete().
+    """
+    if not self.obj:
+      raise ValueError(_("no object to flush changes to").capitalize())
+    deferred = self.__deferred
+    self.__deferred = {'add': {}, 'remove': {}, 'save': {}, 'delete': {}}
+    for entry in deferred['save'].values():
+      related_obj = entry['object']
+      concrete_fields = related_obj._meta.concrete_fields
+      names = {f.name for f in concrete_fields}
+      if related_obj.pk and entry['fields'] and all(field in names for field in entry['fields']):
+        update_fields = entry['fields'] + [f.name for f in concrete_fields if getattr(f, 'auto_now', False) and f.name not in entry['fields']]
+        related_obj.save(update_fields=update_fields)
+      else:
+        related_obj.save()
+    for field, objs in deferred['remove'].items():
+      getattr(self.obj, field).remove(*objs)
+    for field, objs in deferred['add'].items():
+      getattr(self.obj, field).add(*objs)
+    for model, objs in deferred['delete'].items():
+      # Models overriding delete() (e.g. soft-delete) are deleted one by one
+      if model.delete is models.Model.delete:
+        model._default_manager.filter(pk__in=[obj.pk for obj in objs]).delete()
+      else:
+        for obj in objs:
+          obj.delete()
+    return True
   
   ''' Manage Change Logging '''
   def report_change(self, change):
     self.__changes.append(change)
   def count_changes(self):
     return len(self.__changes)
+  def get_changed_field_names(self):
+    """
+    Return the names of the object fields that appear in the change log.
+    Related-object changes such as 'links.url' are reported as 'links'.
+    """
+    return list(dict.fromkeys(str(change['field']).split('.')[0] for change in self.__changes if change.get('field')))
+  def get_change_summary(self):
+    """
+    Return the change log as a JSON-serializable list.
+
+    Each entry holds 'field', 'old' and 'new' values, plus 'description' and
+    'related_object' when the change was reported with them.
+    """
+    def serialize(value):
+      if value is None or isinstance(value, (bool, int, float)):
+        return value
+      return str(value)
+    summary = []
+    for change in self.__changes:
+      entry = {
+        'field': change.get('field'),
+        'old': serialize(change.get('old_value')),
+        'new': serialize(change.get('new_value')),
+      }
+      for key in ['description', 'related_object']:
+        if key in change:
+          entry[key] = serialize(change[key])
+      summary.append(entry)
+    return summary
   def get_changes(self):
     if len(self.__changes) == 0:
       return None
@@ -0,0 +1,75 @@
+from django.db.models.query import QuerySet
+
+''' Declarative JSON serialization
+    Models list the values returned for format=json:
+
+      class Tag(TagModel):
+        ajax_json_key = 'slug'
+        ajax_json_fields = {'id': 'id', 'slug': 'slug', 'name': 'name', 'parent': 'parent__name'}
+        ajax_json_related = {'children': ['slug', 'name']}
+
+    ajax_json_fields is a list of field names or a dict of output name to
+    lookup; related projections use lookups such as parent__name.
+    ajax_json_related maps a to-many relation to the lookups of its items
+    and costs one query per relation. With ajax_json_key the result is a
+    dict keyed by that field, as the model/<name>.json templates build it;
+    otherwise a list. Set ajax_json_native = True to use the serializer
+    even when a JSON template exists.
+'''
+
+def has_json_serializer(model):
+  """ Return True if the model declares ajax_json_fields. """
+  return bool(getattr(model, 'ajax_json_fields', None))
+
+def prefers_json_serializer(model):
+  """ Return True if the model opts in to skip JSON templates. """
+  return has_json_serializer(model) and getattr(model, 'ajax_json_native', False)
+
+def get_json_fields(model):
+  """ Return the declared fields as a dict of output name to lookup. """
+  fields = getattr(model, 'ajax_json_fields', None) or {}
+  if isinstance(fields, dict):
+    return dict(fields)
+  return {field: field for field in fields}
+
+def serialize_queryset(queryset):
+  """
+  Serialize a queryset with the declaration of its model, built from
+  values() without instantiating model objects.
+
+  Returns:
+    list | dict: Rows in queryset order, keyed by ajax_json_key if set.
+  """
+  model = queryset.model
+  fields = get_json_fields(model)
+  related = getattr(model, 'ajax_json_related', None) or {}
+  key = getattr(model, 'ajax_json_key', None)
+  queryset = queryset.prefetch_related(None)
+  lookups = list(dict.fromkeys(['pk'] + list(fields.values()) + ([key] if key else [])))
+  rows = list(queryset.values(*lookups))
+  data = [{name: row[lookup] for name, lookup in fields.items()} for row in rows]
+  if related and rows:
+    pks = [row['pk'] for row in rows]
+    for relation, item_lookups in related.items():
+      items = {pk: [] for pk in pks}
+      values = model._base_manager.filter(pk__in=pks).values_list('pk', *[f'{relation}__{lookup}' for lookup in item_lookups])
+      for pk, *item in values:
+        if any(value is not None for value in item):
+          items[pk].append(dict(zip(item_lookups, item)))
+      for row, serialized in zip(rows, data):
+        serialized[relation] = items[row['pk']]
+  if key:
+    return {str(row[key]): serialized for row, serialized in zip(rows, data)}
+  return data
+
+def serialize_object(obj):
+  """ Serialize a single object with the declaration of its model. """
+  return serialize_queryset(obj.__class__._base_manager.filter(pk=obj.pk))
+
+def serialize_value(value):
+  """ Serialize a queryset or model instance, or return None if its model has no declaration. """
+  if isinstance(value, QuerySet) and has_json_serializer(value.model):
+    return serialize_queryset(value)
+  if hasattr(value, '_meta') and getattr(value, 'pk', None) is not None and has_json_serializer(value.__class__):
+    return serialize_object(value)
+  return None
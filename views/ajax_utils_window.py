@@ -0,0 +1,113 @@
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+import base64
+import json
+
+''' Windowed field reads
+    Field reads with ?limit= render a window of a related queryset instead
+    of all rows. ?after[<field>]= takes the `next` cursor of the previous
+    window of that field. Cursors hold the values of the ordering fields of
+    the last row (keyset), so later windows do not scan the rows before
+    them. Querysets ordered by expressions, relations or nullable fields use
+    an offset instead.
+'''
+
+def _encode_value(value):
+  # Full precision; field.to_python() reads the strings back
+  return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+def encode_cursor(data):
+  return base64.urlsafe_b64encode(json.dumps(data, default=_encode_value, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+  if not isinstance(cursor, str):
+    raise ValueError(_("invalid cursor '{}'").format(cursor).capitalize())
+  try:
+    data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8'))
+  except (ValueError, TypeError):
+    data = None
+  if not isinstance(data, dict) or not isinstance(data.get('v', data.get('o')), (list, int)):
+    raise ValueError(_("invalid cursor '{}'").format(cursor).capitalize())
+  return data
+
+def get_keyset_ordering(queryset):
+  """
+  Return the ordering of queryset as [(field, descending)] ending with the
+  primary key, or None if it cannot be used as a keyset.
+  """
+  meta = queryset.model._meta
+  if queryset.query.order_by:
+    ordering = list(queryset.query.order_by)
+  elif queryset.query.default_ordering:
+    ordering = list(meta.ordering or [])
+  else:
+    ordering = []
+  keys = []
+  for item in ordering:
+    if not isinstance(item, str) or item == '?' or '__' in item:
+      return None
+    name = item.lstrip('-')
+    try:
+      field = meta.pk if name == 'pk' else meta.get_field(name)
+    except FieldDoesNotExist:
+      return None
+    if not field.concrete or field.is_relation or field.null:
+      return None
+    keys.append((field, item.startswith('-')))
+  if not any(field.primary_key for field, descending in keys):
+    keys.append((meta.pk, False))
+  return keys
+
+def window_queryset(queryset, limit, after=None, evaluate=None):
+  """
+  Return one window of queryset and its position.
+
+  Args:
+    queryset (QuerySet): The full, filtered queryset.
+    limit (int): Number of rows in the window.
+    after (str): Cursor returned as `next` for the previous window.
+    evaluate (callable): Evaluates a queryset, e.g. IdentityMap.evaluate.
+
+  Returns:
+    tuple: (window, {'count', 'limit', 'next'}). The window is a sliced
+    queryset with its rows loaded; next is None after the last window.
+  """
+  count = queryset.count()
+  keys = get_keyset_ordering(queryset)
+  cursor = decode_cursor(after) if after else None
+  offset = 0
+  if keys is not None:
+    queryset = queryset.order_by(*[('-' if descending else '') + field.attname for field, descending in keys])
+    if cursor is not None:
+      values = cursor.get('v')
+      if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError(_("invalid cursor '{}'").format(after).capitalize())
+      try:
+        values = [field.to_python(value) for (field, descending), value in zip(keys, values)]
+      except ValidationError:
+        raise ValueError(_("invalid cursor '{}'").format(after).capitalize())
+      condition = Q()
+      for i, ((field, descending), value) in enumerate(zip(keys, values)):
+        step = Q(**{f"{field.attname}__{'lt' if descending else 'gt'}": value})
+        for (previous, _descending), previous_value in zip(keys[:i], values[:i]):
+          step &= Q(**{previous.attname: previous_value})
+        condition |= step
+      queryset = queryset.filter(condition)
+  elif cursor is not None:
+    offset = cursor.get('o')
+    if not isinstance(offset, int) or offset < 0:
+      raise ValueError(_("invalid cursor '{}'").format(after).capitalize())
+  probe = queryset[offset:offset + limit + 1]
+  rows = list((evaluate or (lambda qs: qs))(probe))
+  window = queryset[offset:offset + limit]
+  window._result_cache = rows[:limit]
+  next_cursor = None
+  if len(rows) > limit:
+    last = rows[limit - 1]
+    if keys is not None:
+      next_cursor = encode_cursor({'v': [getattr(last, field.attname) for field, descending in keys]})
+    else:
+      next_cursor = encode_cursor({'o': offset + limit})
+  return window, {'count': count, 'limit': limit, 'next': next_cursor}